@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 import re
+import sys
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -16,34 +18,92 @@ def get_file_content( _file_path, _as_lines = False ) :
             data = f.read()
     return data
 
+# +1 for "(", -1 for ")", 0 for anything else, indexed by the character code
+STEPS = np.zeros( 256, dtype = np.int8 )
+STEPS[ ord( "(" ) ] = 1
+STEPS[ ord( ")" ) ] = -1
+
+def get_floors( _data, _start_floor = 0 ) :
+    # floor after each instruction
+    steps = STEPS[ np.frombuffer( _data.encode() if isinstance( _data, str ) else _data, dtype = np.uint8 ) ]
+    return np.cumsum( steps, dtype = np.int64 ) + _start_floor
+
+def get_first_arrivals( _floors, _targets, _start_floor = 0, _offset = 0 ) :
+    # position (starting at 1, plus offset) of the first arrival at each target floor not reached before
+    # the floor changes by 1 at most: the first arrival above the start is the first time
+    # the highest floor so far reaches the target (and the same with the lowest floor below)
+    arrivals = {}
+    if len( _floors ) == 0 :
+        return arrivals
+    highest = np.maximum.accumulate( _floors )
+    lowest_negated = -np.minimum.accumulate( _floors )
+    for target in _targets :
+        if target > _start_floor :
+            p = np.searchsorted( highest, target )
+        elif target < _start_floor :
+            p = np.searchsorted( lowest_negated, -target )
+        else :
+            continue
+        if p < len( _floors ) :
+            arrivals[ target ] = _offset + int( p ) + 1
+    return arrivals
+
 def find_floor( _data, _stop_at_floor = 0 ) :
     if ( _stop_at_floor == 0 ) :
         return 0
-    floor = 0
-    floor_found = False
-    for p, c in enumerate( _data ) :
-        if c == "(" :
-            floor += 1
-        elif c == ")" :
-            floor -= 1
-        floor_found = ( floor == _stop_at_floor )
-        if floor_found :
-            break
-    return ( p + 1 ) if floor_found else None
+    return get_first_arrivals( get_floors( _data ), [ _stop_at_floor ] ).get( _stop_at_floor )
+
+def get_floor_stats( _floors, _targets = () ) :
+    # final, lowest and highest floors (the start floor 0 included), first arrival at each target floor
+    lowest = min( 0, int( _floors.min() ) ) if len( _floors ) > 0 else 0
+    highest = max( 0, int( _floors.max() ) ) if len( _floors ) > 0 else 0
+    final = int( _floors[ -1 ] ) if len( _floors ) > 0 else 0
+    arrivals = get_first_arrivals( _floors, [ t for t in _targets if t != 0 ] )
+    if 0 in _targets :
+        arrivals[ 0 ] = 0
+    return final, lowest, highest, arrivals
+
+def get_floor_stats_streaming( _file_path, _targets = (), _chunk_size = 1 << 24 ) :
+    # same results as get_floor_stats, the file being read chunk by chunk
+    # the running floor, the lowest and highest floors are carried from a chunk to the next
+    floor, lowest, highest = 0, 0, 0
+    arrivals = { 0: 0 } if 0 in _targets else {}
+    remaining = [ t for t in _targets if t != 0 ]
+    position = 0
+    with open( _file_path, 'rb' ) as f :
+        while len( chunk := f.read( _chunk_size ) ) > 0 :
+            floors = get_floors( chunk, floor )
+            # targets not reached yet are above the highest floor or below the lowest floor
+            for target, p in get_first_arrivals( floors, remaining, floor, position ).items() :
+                arrivals[ target ] = p
+            remaining = [ t for t in remaining if t not in arrivals ]
+            lowest = min( lowest, int( floors.min() ) )
+            highest = max( highest, int( floors.max() ) )
+            floor = int( floors[ -1 ] )
+            position += len( chunk )
+    return floor, lowest, highest, arrivals
 
 def do_tests() :
     datas = get_file_content( get_test_file_path(), True )
     for data in datas :
         print( data, "=> basement reached at position #", find_floor( data, -1 ) )
 
-def do_input() :
-    data = get_file_content( get_input_file_path(), False )
-    position_basement = find_floor( data, -1 )
+def do_input( _streaming = False ) :
+    if ( _streaming ) :
+        # the file is read chunk by chunk, the basement position is the first arrival at floor -1
+        final, lowest, highest, arrivals = get_floor_stats_streaming( get_input_file_path(), [ -1, 1 ] )
+        position_basement = arrivals.get( -1 )
+    else :
+        data = get_file_content( get_input_file_path(), False )
+        position_basement = find_floor( data, -1 )
+        final, lowest, highest, arrivals = get_floor_stats( get_floors( data ), [ -1, 1 ] )
     print( "Challenge result: basement reached at position #", position_basement )
+    print( f"Final floor: {final}, lowest floor: {lowest}, highest floor: {highest}, first arrivals: {arrivals}" )
 
 def main() :
     do_tests()
-    do_input()
+    # with --streaming, the input file is read chunk by chunk
+    do_input( "--streaming" in sys.argv )
 
 if __name__ == '__main__':
     main()
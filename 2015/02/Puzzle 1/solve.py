@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 import time
-import re
+from itertools import islice
+import numpy as np
 
 def get_test_file_path( i = None ) :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -14,30 +15,32 @@ def get_file_content( file_path ) :
         data = f.read()
     return data
 
-BOX_RE = re.compile( r"(\d+)x(\d+)x(\d+)" )
+def get_box_array( str_data: str ) -> np.ndarray :
+    # ( N, 3 ) array of dimensions, in one parse of the whole text (x and new lines as separators)
+    return np.fromstring( str_data.replace( "x", " " ), dtype = np.int64, sep = " " ).reshape( -1, 3 )
 
-def parse_data( str_data: str, verbose: bool = False ) :
-    boxes = []
-    for line in str_data.strip().split( "\n" ) :
-        match = BOX_RE.match( line )
-        if match is not None :
-            boxes.append( tuple( int(v) for v in match.groups() ) )
-    print( f"{len(boxes)} boxes read" )
-    return boxes
+def get_paper_surfaces( boxes: np.ndarray ) -> np.ndarray :
+    # with sorted dimensions a <= b <= c, the smallest side is a*b
+    a, b, c = np.sort( boxes, axis = 1 ).T
+    return 2 * ( a*b + a*c + b*c ) + a*b
+
+def iter_box_chunks( file_path, chunk_lines: int = 1 << 22 ) :
+    with open( file_path, 'r' ) as f :
+        while len( lines := list( islice( f, chunk_lines ) ) ) > 0 :
+            yield get_box_array( "".join( lines ) )
 
-def get_paper_surface( l, w, h ) :
-    sides = [ l*w, l*h, w*h ]
-    return 2 * sum(sides) + min(sides)
+def get_total_paper_streaming( file_path, chunk_lines: int = 1 << 22 ) -> int :
+    # the file is read chunk by chunk, only the total is kept
+    return sum( int( get_paper_surfaces( boxes ).sum() ) for boxes in iter_box_chunks( file_path, chunk_lines ) )
 
 def do_problem( str_data: str, verbose = False ) :
-    boxes = parse_data( str_data, verbose )
-    total_paper = 0
-    for box in boxes :
-        box_paper = get_paper_surface( *box )
-        if verbose :
-            print( f"Box {box} needs {box_paper} square feet of paper" )
-        total_paper += box_paper
-    print( f"Total square feet of paper needed: {total_paper}" )
+    boxes = get_box_array( str_data )
+    print( f"{len(boxes)} boxes read" )
+    papers = get_paper_surfaces( boxes )
+    if verbose :
+        for box, box_paper in zip( boxes, papers ) :
+            print( f"Box {tuple( int(v) for v in box )} needs {box_paper} square feet of paper" )
+    print( f"Total square feet of paper needed: {int( papers.sum() )}" )
     print( f"END" )
 
 def do_tests( i = None ) :
@@ -48,6 +51,9 @@ def do_input() :
     str_data = get_file_content( get_input_file_path() )
     do_problem( str_data, False )
 
+def do_input_streaming() :
+    print( f"Total square feet of paper needed: {get_total_paper_streaming( get_input_file_path() )}" )
+
 def main() :
     start = time.time()
     #do_tests(1)
@@ -57,6 +63,7 @@ def main() :
     #do_tests(5)
     #do_tests()
     do_input()
+    #do_input_streaming()
     elapsed = time.time() - start
     print( f"Total execution time: {elapsed:.3f} s" )
 
@@ -2,6 +2,7 @@
 
 import time
 from dataclasses import dataclass
+import numpy as np
 
 def get_test_file_path( i = None ) :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -33,35 +34,73 @@ class Location :
 def parse_data( str_data: str, verbose: bool = False ) :
     return str_data.strip()
 
-def do_moves( name: str, moves: str, start: Location, verbose: bool ) -> set :
-    print( f"{name} moves {len(moves)} times and starts from {start}" )
-    if verbose :
-        print( f"{name} moves: {moves}" )
-    houses = { start }
-    current = start
-    for m in moves :
-        current = current.move( m )
-        houses.add( current )
-    print( f"{name} visited {len(houses)} different houses" )
-    return houses
-
-def do_problem( str_data: str, verbose = False ) :
+# x and y deltas for each move character, in tables indexed by the character code
+MOVES = { '>': ( 1, 0 ), '^': ( 0, 1 ), '<': ( -1, 0 ), 'v': ( 0, -1 ) }
+MOVE_X = np.zeros( 256, dtype = np.int8 )
+MOVE_Y = np.zeros( 256, dtype = np.int8 )
+IS_MOVE = np.zeros( 256, dtype = bool )
+for char, ( dx, dy ) in MOVES.items() :
+    MOVE_X[ ord( char ) ], MOVE_Y[ ord( char ) ] = dx, dy
+    IS_MOVE[ ord( char ) ] = True
+
+def get_move_codes( moves: str ) -> np.ndarray :
+    codes = np.frombuffer( moves.encode(), dtype = np.uint8 )
+    unknown = np.flatnonzero( ~IS_MOVE[ codes ] )
+    if len( unknown ) > 0 :
+        raise RuntimeError( f"Unknown move: {moves[ unknown[0] ]}" )
+    return codes
+
+def get_unique( keys: np.ndarray ) -> np.ndarray :
+    # sorted distinct keys (a sort and a comparison, faster than np.unique for big arrays)
+    keys = np.sort( keys )
+    return keys[ np.concatenate( ( [ True ], keys[ 1: ] != keys[ :-1 ] ) ) ]
+
+def get_visited_keys( codes: np.ndarray, start: Location, offset: int, chunk_size: int ) -> np.ndarray :
+    # houses as packed int64 keys ( x + offset ) * ( 2 * offset + 1 ) + ( y + offset ),
+    # from the cumulative sums of the moves, chunk by chunk (with the last position carried)
+    span = 2 * offset + 1
+    x, y = start.x, start.y
+    keys = [ np.array( [ ( x + offset ) * span + y + offset ], dtype = np.int64 ) ]
+    for i in range( 0, len( codes ), chunk_size ) :
+        chunk = codes[ i:i + chunk_size ]
+        xs = np.cumsum( MOVE_X[ chunk ], dtype = np.int64 ) + x
+        ys = np.cumsum( MOVE_Y[ chunk ], dtype = np.int64 ) + y
+        x, y = int( xs[ -1 ] ), int( ys[ -1 ] )
+        xs += offset
+        xs *= span
+        xs += ys + offset
+        keys.append( get_unique( xs ) )
+    return get_unique( np.concatenate( keys ) )
+
+def get_agent_name( agent: int ) -> str :
+    return "Santa" if agent == 0 else "Robo-Santa" if agent == 1 else f"Robo-Santa #{agent}"
+
+def do_problem( str_data: str, nb_agents: int = 2, chunk_size: int = 1 << 24, verbose = False ) :
+    # the agents take turns: agent i does the moves i, i + nb_agents, i + 2 * nb_agents...
     moves = parse_data( str_data, verbose )
     if verbose :
         print( f"Moves: {moves}" )
-    santa_houses = do_moves( "Santa", moves[::2], Location( 0, 0 ), verbose )
-    robo_houses = do_moves( "Robo-Santa", moves[1::2], Location( 0, 0 ), verbose )
-    houses = santa_houses.union( robo_houses )
-    print( f"In total, {len(houses)} different houses were visited at least once" )
+    codes = get_move_codes( moves )
+    # no house is further than the number of moves from the start
+    offset = len( moves ) + 1
+    all_keys = []
+    for agent in range( nb_agents ) :
+        name = get_agent_name( agent )
+        agent_codes = codes[ agent::nb_agents ]
+        print( f"{name} moves {len(agent_codes)} times and starts from {Location( 0, 0 )}" )
+        keys = get_visited_keys( agent_codes, Location( 0, 0 ), offset, chunk_size )
+        print( f"{name} visited {len(keys)} different houses" )
+        all_keys.append( keys )
+    print( f"In total, {len( get_unique( np.concatenate( all_keys ) ) )} different houses were visited at least once" )
     print( f"END" )
 
 def do_tests( i = None ) :
     str_data = get_file_content( get_test_file_path( i ) )
-    do_problem( str_data, True )
+    do_problem( str_data, verbose = True )
 
 def do_input() :
     str_data = get_file_content( get_input_file_path() )
-    do_problem( str_data, False )
+    do_problem( str_data, verbose = False )
 
 def main() :
     start = time.time()
@@ -1,6 +1,10 @@
 #!/usr/bin/env python3
 
 import time
+import os
+import tempfile
+from itertools import islice
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -8,51 +12,92 @@ def get_test_file_path() :
 def get_input_file_path() :
     return "input.txt"
 
-def get_file_content( _file_path, _as_lines = False ) :
-    with open( _file_path, 'r' ) as f :
-        if ( _as_lines ) :
-            data = f.readlines()
-        else :
-            data = f.read()
-    return data
-
 def do_check(  ) :
     None
 
-def get_lists( str_datas, sep = '   ' ) :
-    left = []
-    right = []
-    for line in str_datas:
-        str_values = line.split( sep )
-        left.append( int( str_values[0] ) )
-        right.append( int( str_values[1] ) )
-    return left, right
-
-def do_problem( left, right ) :
-    left.sort()
-    right.sort()
-    dist = []
-    for a, b in zip( left, right ) :
-        d = abs( a - b )
-        print( f"| {a} - {b} | = {d}" )
-        dist.append( d )
-    print( f"Total distance: {sum( dist )}" )
+def get_arrays( file_path ) :
+    # both columns in one bulk parse, as int64 arrays
+    values = np.fromfile( file_path, dtype = np.int64, sep = " " ).reshape( -1, 2 )
+    return values[ :, 0 ], values[ :, 1 ]
+
+def get_total_distance( left, right ) :
+    return int( np.abs( np.sort( left ) - np.sort( right ) ).sum() )
+
+def iter_chunks( file_path, chunk_rows = 10_000_000 ) :
+    # ( rows, 2 ) arrays of at most chunk_rows rows
+    with open( file_path, 'r' ) as f :
+        while len( lines := list( islice( f, chunk_rows ) ) ) > 0 :
+            yield np.fromstring( "".join( lines ), dtype = np.int64, sep = " " ).reshape( -1, 2 )
+
+def iter_merged( runs, block_size ) :
+    # k-way merge of sorted arrays, block by block: the values of all the runs below
+    # the smallest last value of the current blocks are sorted and given together
+    positions = [ 0 ] * len( runs )
+    while True :
+        blocks = [ run[ position:position + block_size ] for run, position in zip( runs, positions ) ]
+        limits = [ block[ -1 ] for run, block, position in zip( runs, blocks, positions ) if position + len( block ) < len( run ) ]
+        if len( limits ) == 0 :
+            # last blocks of every run
+            yield np.sort( np.concatenate( blocks ) )
+            return
+        limit = min( limits )
+        ends = [ int( np.searchsorted( block, limit, side = "right" ) ) for block in blocks ]
+        yield np.sort( np.concatenate( [ block[ :end ] for block, end in zip( blocks, ends ) ] ) )
+        positions = [ position + end for position, end in zip( positions, ends ) ]
+
+def iter_aligned( blocks_a, blocks_b ) :
+    # pairs of blocks of the same length, from two streams of blocks with the same total length
+    buffer_b = np.empty( 0, dtype = np.int64 )
+    for block_a in blocks_a :
+        while len( buffer_b ) < len( block_a ) :
+            buffer_b = np.concatenate( ( buffer_b, next( blocks_b ) ) )
+        yield block_a, buffer_b[ :len( block_a ) ]
+        buffer_b = buffer_b[ len( block_a ): ]
+
+def get_total_distance_external( file_path, chunk_rows = 10_000_000, block_size = 1_000_000 ) :
+    """
+    External sort, for lists too large for the memory
+
+    Each chunk of rows gives a sorted run per column, saved in a temporary folder.
+    The runs are read back as memory maps and merged block by block,
+    the merged left and right columns are then compared block by block.
+    """
+    with tempfile.TemporaryDirectory() as folder :
+        runs = { "left": [], "right": [] }
+        for i, chunk in enumerate( iter_chunks( file_path, chunk_rows ) ) :
+            for column, name in enumerate( runs ) :
+                run_path = os.path.join( folder, f"{name}_{i}.npy" )
+                np.save( run_path, np.sort( chunk[ :, column ] ) )
+                runs[ name ].append( run_path )
+        if len( runs[ "left" ] ) == 0 :
+            return 0
+        left = iter_merged( [ np.load( path, mmap_mode = "r" ) for path in runs[ "left" ] ], block_size )
+        right = iter_merged( [ np.load( path, mmap_mode = "r" ) for path in runs[ "right" ] ], block_size )
+        return sum( int( np.abs( a - b ).sum() ) for a, b in iter_aligned( left, right ) )
+
+def do_problem( left, right, verbose = False ) :
+    if verbose :
+        for a, b in zip( np.sort( left ), np.sort( right ) ) :
+            print( f"| {a} - {b} | = {abs( a - b )}" )
+    print( f"Total distance: {get_total_distance( left, right )}" )
 
 def do_tests() :
-    str_datas = get_file_content( get_test_file_path(), True )
-    left, right = get_lists( str_datas )
-    do_problem( left, right )
+    left, right = get_arrays( get_test_file_path() )
+    do_problem( left, right, True )
 
 def do_input() :
-    str_datas = get_file_content( get_input_file_path(), True )
-    left, right = get_lists( str_datas )
+    left, right = get_arrays( get_input_file_path() )
     do_problem( left, right )
 
+def do_input_external() :
+    print( f"Total distance: {get_total_distance_external( get_input_file_path() )}" )
+
 def main() :
     start = time.time()
     #do_check( 123, 10 )
     #do_tests()
     do_input()
+    #do_input_external()
     elapsed = time.time() - start
     print( f"Total execution time: {elapsed:.3f} s" )
 
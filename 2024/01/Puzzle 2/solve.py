@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
 import time
+from itertools import islice
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -8,55 +10,76 @@ def get_test_file_path() :
 def get_input_file_path() :
     return "input.txt"
 
-def get_file_content( _file_path, _as_lines = False ) :
-    with open( _file_path, 'r' ) as f :
-        if ( _as_lines ) :
-            data = f.readlines()
-        else :
-            data = f.read()
-    return data
-
 def do_check(  ) :
     None
 
-def get_lists( str_datas, sep = '   ' ) :
-    left = []
-    right = []
-    for line in str_datas:
-        str_values = line.split( sep )
-        left.append( int( str_values[0] ) )
-        right.append( int( str_values[1] ) )
-    return left, right
-
-def do_problem( left, right ) :
-    dright = {} # nb d'occurences de chaque valeur dans la liste "right"
-    for b in right :
-        if b in dright :
-            dright[ b ] += 1
-        else :
-            dright[ b ] = 1
-    sim = []
-    for a in left :
-        sim_a = a * ( dright[ a ] if a in dright else 0 )
-        print( f"similarity( {a} ) = {sim_a}" )
-        sim.append( sim_a )
-    print( f"Total similarity: {sum( sim )}" )
+def get_arrays( file_path ) :
+    # both columns in one bulk parse, as int64 arrays
+    values = np.fromfile( file_path, dtype = np.int64, sep = " " ).reshape( -1, 2 )
+    return values[ :, 0 ], values[ :, 1 ]
+
+def get_similarities( left_values, left_counts, right_values, right_counts ) :
+    # similarity of each distinct value of the left list: value * occurrences in right * occurrences in left
+    # (values are sorted, as given by np.unique)
+    indexes = np.minimum( np.searchsorted( right_values, left_values ), len( right_values ) - 1 )
+    occurrences = np.where( right_values[ indexes ] == left_values, right_counts[ indexes ], 0 )
+    return left_values * occurrences * left_counts
+
+def get_total_similarity( left, right ) :
+    if len( left ) == 0 or len( right ) == 0 :
+        return 0
+    return int( get_similarities( *np.unique( left, return_counts = True ), *np.unique( right, return_counts = True ) ).sum() )
+
+def iter_chunks( file_path, chunk_rows = 10_000_000 ) :
+    # ( rows, 2 ) arrays of at most chunk_rows rows
+    with open( file_path, 'r' ) as f :
+        while len( lines := list( islice( f, chunk_rows ) ) ) > 0 :
+            yield np.fromstring( "".join( lines ), dtype = np.int64, sep = " " ).reshape( -1, 2 )
+
+def add_counts( values, counts, new_values ) :
+    # distinct values and their counts, updated with new values
+    new_values, new_counts = np.unique( new_values, return_counts = True )
+    all_values, inverse = np.unique( np.concatenate( ( values, new_values ) ), return_inverse = True )
+    all_counts = np.zeros( len( all_values ), dtype = np.int64 )
+    np.add.at( all_counts, inverse, np.concatenate( ( counts, new_counts ) ) )
+    return all_values, all_counts
+
+def get_total_similarity_streaming( file_path, chunk_rows = 10_000_000 ) :
+    # only the distinct values of each list and their counts are kept in memory, chunk after chunk
+    empty = ( np.empty( 0, dtype = np.int64 ), np.empty( 0, dtype = np.int64 ) )
+    left, right = empty, empty
+    for chunk in iter_chunks( file_path, chunk_rows ) :
+        left = add_counts( *left, chunk[ :, 0 ] )
+        right = add_counts( *right, chunk[ :, 1 ] )
+    if len( left[0] ) == 0 or len( right[0] ) == 0 :
+        return 0
+    return int( get_similarities( *left, *right ).sum() )
+
+def do_problem( left, right, verbose = False ) :
+    if verbose :
+        right_values, right_counts = np.unique( right, return_counts = True )
+        similarities = get_similarities( left, np.ones_like( left ), right_values, right_counts )
+        for a, sim_a in zip( left, similarities ) :
+            print( f"similarity( {a} ) = {sim_a}" )
+    print( f"Total similarity: {get_total_similarity( left, right )}" )
 
 def do_tests() :
-    str_datas = get_file_content( get_test_file_path(), True )
-    left, right = get_lists( str_datas )
-    do_problem( left, right )
+    left, right = get_arrays( get_test_file_path() )
+    do_problem( left, right, True )
 
 def do_input() :
-    str_datas = get_file_content( get_input_file_path(), True )
-    left, right = get_lists( str_datas )
+    left, right = get_arrays( get_input_file_path() )
     do_problem( left, right )
 
+def do_input_streaming() :
+    print( f"Total similarity: {get_total_similarity_streaming( get_input_file_path() )}" )
+
 def main() :
     start = time.time()
     #do_check( 123, 10 )
     #do_tests()
     do_input()
+    #do_input_streaming()
     elapsed = time.time() - start
     print( f"Total execution time: {elapsed:.3f} s" )
 
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import time
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -26,39 +27,60 @@ def parse_data( str_datas, sep = ' ' ) :
         all_datas.append( line_data )
     return all_datas
 
-def check_report( report, min_diff = 1, max_diff = 3 ) :
-    safe = True
-    prev_diff = 0
-    prev = report[0]
-    for v in report[1:] :
-        diff = v - prev
-        if abs( diff ) < min_diff :
-            #print( f"Difference {diff} < {min_diff}" )
-            safe = False
-            break
-        if abs( diff ) > max_diff :
-            #print( f"Difference {diff} > {max_diff}" )
-            safe = False
-            break
-        prev = v
-        if diff != 0 :
-            if prev_diff * diff < 0 :
-                #print( f"Change of direction from {prev_diff} to {diff}" )
-                safe = False
-                break
-            prev_diff = diff
+def get_removals( report, max_removals = 1, direction = 1, min_diff = 1, max_diff = 3 ) :
+    # single pass on the report: removals[i] is the minimum number of removed levels
+    # before level i, for a safe report ending with level i (kept)
+    # only the max_removals + 1 previous levels can come just before level i
+    too_many = max_removals + 1
+    removals = []
+    for i, v in enumerate( report ) :
+        best = i if i <= max_removals else too_many
+        for j in range( max( 0, i - max_removals - 1 ), i ) :
+            diff = ( v - report[j] ) * direction
+            if min_diff <= diff <= max_diff :
+                best = min( best, removals[j] + i - j - 1 )
+        removals.append( best )
+    # the last levels can be removed too
+    n = len( report )
+    return min( removals[i] + n - 1 - i for i in range( max( 0, n - 1 - max_removals ), n ) )
+
+def check_report_removals( report, max_removals = 1, min_diff = 1, max_diff = 3 ) :
+    return any( get_removals( report, max_removals, direction, min_diff, max_diff ) <= max_removals
+               for direction in ( 1, -1 ) )
+
+def check_reports_numpy( reports, max_removals = 1, min_diff = 1, max_diff = 3 ) :
+    # same pass as get_removals, for a batch of reports of the same length (one report per row),
+    # with one column of levels at a time
+    reports = np.asarray( reports, dtype = np.int32 )
+    nb_reports, n = reports.shape
+    too_many = max_removals + 1
+    safe = np.zeros( nb_reports, dtype = bool )
+    for direction in ( 1, -1 ) :
+        removals = np.full( ( nb_reports, n ), too_many, dtype = np.int32 )
+        removals[ :, :max_removals + 1 ] = np.arange( min( n, max_removals + 1 ) )
+        for i in range( 1, n ) :
+            for j in range( max( 0, i - max_removals - 1 ), i ) :
+                diff = ( reports[ :, i ] - reports[ :, j ] ) * direction
+                valid = ( diff >= min_diff ) & ( diff <= max_diff )
+                np.minimum( removals[ :, i ], np.where( valid, removals[ :, j ] + i - j - 1, too_many ), out = removals[ :, i ] )
+        last = range( max( 0, n - 1 - max_removals ), n )
+        safe |= np.min( [ removals[ :, i ] + n - 1 - i for i in last ], axis = 0 ) <= max_removals
     return safe
 
-def do_problem( data ) :
+def count_safe_reports( data, max_removals = 1 ) :
+    # reports are grouped by length, each group is checked as a batch
+    by_length = {}
+    for line in data :
+        by_length.setdefault( len( line ), [] ).append( line )
+    return sum( int( np.count_nonzero( check_reports_numpy( reports, max_removals ) ) ) for reports in by_length.values() )
+
+def do_problem( data, max_removals = 1, batch = True ) :
+    if batch :
+        print( f"Number of safe reports found: {count_safe_reports( data, max_removals )}" )
+        return
     all_results = []
     for i, line in enumerate( data ) :
-        safe = check_report( line )
-        if not safe :
-            for j in range( len(line) ) :
-                safe = check_report( line[:j] + line[j+1:] )
-                if safe :
-                    #print( f"Safe by removing item #{j+1}" )
-                    break;
+        safe = check_report_removals( line, max_removals )
         print( f"{i+1}: {'Safe' if safe else 'Unsafe'}" )
         all_results.append( 1 if safe else 0 )
     print( f"Number of safe reports found: {sum( all_results )}" )
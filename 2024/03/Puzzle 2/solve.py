@@ -2,6 +2,8 @@
 
 import time
 import re
+import os
+import mmap
 
 def get_test_file_path() :
     return "tests.txt"
@@ -9,57 +11,71 @@ def get_test_file_path() :
 def get_input_file_path() :
     return "input.txt"
 
-def get_file_content( _file_path, _as_lines = True ) :
-    with open( _file_path, 'r' ) as f :
-        if ( _as_lines ) :
-            data = f.readlines()
-        else :
-            data = f.read()
-    return data
-
 def do_check(  ) :
     None
 
-do_dont_re = re.compile( r"(do(?:n't)?\(\))" )
-mul_re = re.compile( r"mul\((\d{1,3}),(\d{1,3})\)" )
+instruction_re = re.compile( rb"mul\((\d{1,3}),(\d{1,3})\)|do\(\)|don't\(\)" )
+# longest instruction: mul(123,456)
+MAX_INSTRUCTION_LENGTH = 12
 
-def do_part( str_data ) :
-    multiplicands = mul_re.findall( str_data )
-    #print( multiplicands )
-    mul_result = [ int(a) * int(b) for a, b in multiplicands ]
-    #print( mul_result )
-    sum_mul = sum( mul_result )
-    print( f"Sum of partial string: {sum_mul}" )
-    return sum_mul
+def iter_file_chunks( file_path, chunk_size = 1 << 20, use_mmap = False ) :
+    with open( file_path, 'rb' ) as f :
+        if use_mmap :
+            if os.fstat( f.fileno() ).st_size == 0 :
+                # an empty file cannot be mapped, and has no chunk anyway
+                return
+            with mmap.mmap( f.fileno(), 0, access = mmap.ACCESS_READ ) as m :
+                for start in range( 0, len( m ), chunk_size ) :
+                    yield m[ start:start + chunk_size ]
+        else :
+            while chunk := f.read( chunk_size ) :
+                yield chunk
 
-def do_problem( str_data ) :
-    parts = do_dont_re.split( str_data )
-    print( parts )
-    do_mul = True
-    partial_sums = []
-    for part in parts :
-        if part == "do()" :
+def do_instruction( match, sum_mul, enabled, conditionals, verbose ) :
+    instruction = match.group( 0 )
+    if instruction == b"do()" :
+        if verbose :
             print( "Activating mul" )
-            do_mul = True
-        elif part == "don't()" :
+        return sum_mul, True
+    elif instruction == b"don't()" :
+        if verbose :
             print( "Deactivating mul" )
-            do_mul = False
-        elif do_mul :
-            print( "Mul activated: analysing partial string" )
-            partial_sums.append( do_part( part ) )
-        else :
-            print( "Mul not activated: discarding partial string" )
-    print( partial_sums )
-    sum_mul = sum( partial_sums )
+        return sum_mul, not conditionals
+    elif enabled :
+        if verbose :
+            print( f"{instruction.decode()}: {int( match.group( 1 ) ) * int( match.group( 2 ) )}" )
+        return sum_mul + int( match.group( 1 ) ) * int( match.group( 2 ) ), enabled
+    return sum_mul, enabled
+
+def scan_chunks( chunks, conditionals = True, verbose = False ) :
+    # one pass on the memory, chunk by chunk, with the state carried from a chunk to the next:
+    # mul enabled or not, and the end of the chunk that may hold the start of an instruction
+    # instructions starting in the last MAX_INSTRUCTION_LENGTH - 1 bytes are left for the next chunk
+    enabled = True
+    sum_mul = 0
+    tail = b""
+    for chunk in chunks :
+        data = tail + chunk
+        cut = len( data ) - MAX_INSTRUCTION_LENGTH + 1
+        for match in instruction_re.finditer( data ) :
+            if match.start() >= cut :
+                break
+            cut = max( cut, match.end() )
+            sum_mul, enabled = do_instruction( match, sum_mul, enabled, conditionals, verbose )
+        tail = data[ max( cut, 0 ): ]
+    for match in instruction_re.finditer( tail ) :
+        sum_mul, enabled = do_instruction( match, sum_mul, enabled, conditionals, verbose )
+    return sum_mul
+
+def do_problem( file_path, chunk_size = 1 << 20, use_mmap = False, verbose = False ) :
+    sum_mul = scan_chunks( iter_file_chunks( file_path, chunk_size, use_mmap ), verbose = verbose )
     print( f"Final: {sum_mul}" )
 
 def do_tests() :
-    str_data = get_file_content( get_test_file_path(), False )
-    do_problem( str_data )
+    do_problem( get_test_file_path(), verbose = True )
 
 def do_input() :
-    str_data = get_file_content( get_input_file_path(), False )
-    do_problem( str_data )
+    do_problem( get_input_file_path() )
 
 def main() :
     start = time.time()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import time
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -16,86 +17,79 @@ def get_file_content( _file_path, _as_lines = True ) :
             data = f.read()
     return data
 
-def transpose_str( lines ) :
-    # transformation lignes <-> colonnes
-    return [ "".join(t) for t in zip( *lines ) ]
+# 8 directions (row, col), with their names
+DIRECTIONS = {
+    ( 0, 1 ): "lines",
+    ( 0, -1 ): "backwards lines",
+    ( 1, 0 ): "columns",
+    ( -1, 0 ): "backwards columns",
+    ( 1, 1 ): "diagonals (TL -> BR)",
+    ( -1, -1 ): "diagonals (BR -> TL)",
+    ( 1, -1 ): "diagonals (TR -> BL)",
+    ( -1, 1 ): "diagonals (BL -> TR)",
+}
 
-def reverse_lines( lines ) :
-    # inversion des lignes texte
-    return [ "".join( reversed( line ) ) for line in lines ]
+def get_char_grid( lines, padding = 0 ) :
+    # grid of characters (bytes), surrounded by padding cells of 0, which match no letter
+    lines = [ line.strip() for line in lines if line.strip() != "" ]
+    grid = np.frombuffer( "".join( lines ).encode(), dtype = np.uint8 ).reshape( len( lines ), -1 )
+    return np.pad( grid, padding )
 
-def str_diagonal_tl_br( lines, row, col ) :
-    str_diag = ""
-    while row < len( lines ) and col < len( lines[ row ] ) :
-        str_diag += lines[ row ][ col ]
-        row += 1
-        col += 1
-    return str_diag
+def get_shifted_view( padded_grid, padding, d_row, d_col, k ) :
+    # view of the cells k steps away in the direction, for every cell of the (unpadded) grid
+    height, width = padded_grid.shape[0] - 2 * padding, padded_grid.shape[1] - 2 * padding
+    row, col = padding + k * d_row, padding + k * d_col
+    return padded_grid[ row:row + height, col:col + width ]
 
-def diagonals_tl_br( lines, min_length = 4 ) :
-    diags = []
-    # diagonales qui commencent sur la 1ère colonne
-    for row in range( len( lines ) ) :
-        if row == 0 :
-            # toutes les diagnales qui commencent sur la première ligne
-            for col in range( len( lines[0] ) ) :
-                diag = str_diagonal_tl_br( lines, row, col )
-                if len( diag ) >= min_length :
-                    diags.append( diag )
-        else :
-            # la diagonale qui commence sur la première colonne de la ligne
-            diag = str_diagonal_tl_br( lines, row, 0 )
-            if len( diag ) >= min_length :
-                diags.append( diag )
-    return diags
+def build_trie( words ) :
+    # words sharing a prefix share the comparisons of the prefix
+    trie = {}
+    for word in words :
+        node = trie
+        for c in word.encode() :
+            node = node.setdefault( c, {} )
+        node[ None ] = word
+    return trie
+
+def count_words( lines, words, verbose = False ) :
+    """
+    Counts every word, in the 8 directions, with one mask of start cells per prefix and per direction
 
-def find_in_lines( lines, searched_text, title="Found" ) :
-    count = 0
-    for line in lines :
-        count += line.count( searched_text )
-    print( f"{title}: {count}" )
-    return count
+    The mask of a prefix is the mask of the prefix without its last letter,
+    and the view shifted by the length of the prefix equal to the last letter.
+    Words sharing a prefix (in a trie) share its masks.
+    """
+    padding = max( len( word ) for word in words ) - 1
+    grid = get_char_grid( lines, padding )
+    counts = { word: 0 for word in words }
+    for ( d_row, d_col ), title in DIRECTIONS.items() :
+        direction_counts = { word: 0 for word in words }
+        to_explore = [ ( build_trie( words ), 0, None ) ]
+        while len( to_explore ) > 0 :
+            node, k, mask = to_explore.pop()
+            for c, child in node.items() :
+                if c is None :
+                    direction_counts[ child ] += int( np.count_nonzero( mask ) )
+                    continue
+                view = get_shifted_view( grid, padding, d_row, d_col, k ) == c
+                child_mask = view if mask is None else mask & view
+                if child_mask.any() :
+                    to_explore.append( ( child, k + 1, child_mask ) )
+        if verbose :
+            print( f"Found in {title}: {direction_counts}" )
+        for word, count in direction_counts.items() :
+            counts[ word ] += count
+    return counts
 
-def do_problem( str_data, searched_text = "XMAS" ) :
-    count = 0
-    # Original lines
-    lines = [ line.strip() for line in str_data ]
-    #print( "Lines:", lines )
-    count += find_in_lines( lines, searched_text, title="Found in lines" )
-    # Backwards lines
-    backwards_lines = reverse_lines( lines )
-    #print( "Backwards lines:", backwards_lines )
-    count += find_in_lines( backwards_lines, searched_text, title="Found in backwards lines" )
-    # Columns
-    columns = transpose_str( lines )
-    #print( "Columns:", columns )
-    count += find_in_lines( columns, searched_text, title="Found in columns" )
-    # Backwards columns
-    columns = reverse_lines( columns ) # not necessary to keep columns
-    #print( "Backwards columns:", columns )
-    count += find_in_lines( columns, searched_text, title="Found in backwards columns" )
-    # Diagonals top-left to bottom-right
-    diagonals = diagonals_tl_br( lines )
-    #print( "Diagonals top-left to bottom-right:", diagonals )
-    count += find_in_lines( diagonals, searched_text, title="Found in diagonals (TL -> BR)" )
-    # Diagonals bottom-right to top-left
-    diagonals = reverse_lines( diagonals ) # not necessary to keep diagonals
-    #print( "Diagonals bottom-right to top-left:", diagonals )
-    count += find_in_lines( diagonals, searched_text, title="Found in diagonals (BR -> TL)" )
-    # Diagonals top-right to bottom-left
-    diagonals = diagonals_tl_br( backwards_lines ) # not necessary to keep diagonals
-    #print( "Diagonals top-right to bottom-left:", diagonals )
-    count += find_in_lines( diagonals, searched_text, title="Found in diagonals (TR -> BL)" )
-    # Diagonals bottom-left to top-right
-    diagonals = reverse_lines( diagonals ) # not necessary to keep diagonals
-    #print( "Diagonals bottom-left to top-right:", diagonals )
-    count += find_in_lines( diagonals, searched_text, title="Found in diagonals (BL -> TR)" )
+def do_problem( str_data, searched_texts = ( "XMAS", ), verbose = False ) :
+    counts = count_words( str_data, searched_texts, verbose )
     # Final result
-    print( f"Total found (in 8 directions): {count}" )
+    for word, count in counts.items() :
+        print( f"Total {word} found (in 8 directions): {count}" )
 
 def do_tests() :
     str_data = get_file_content( get_test_file_path(), True )
-    do_problem( str_data )
+    do_problem( str_data, verbose = True )
 
 def do_input() :
     str_data = get_file_content( get_input_file_path(), True )
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import time
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -16,31 +17,60 @@ def get_file_content( _file_path, _as_lines = True ) :
             data = f.read()
     return data
 
-def is_x_mas( lines, row, col, word ) :
-    backwards = "".join( reversed( word ) ) # "SAM"
-    center = word[ 1 ] # "A"
-    top_left = lines[ row - 1 ][ col - 1 ]
-    top_right = lines[ row - 1 ][ col + 1 ]
-    bottom_left = lines[ row + 1 ][ col - 1 ]
-    bottom_right = lines[ row + 1 ][ col + 1 ]
-    word1 = "".join( [ top_left, center, bottom_right ] )
-    word2 = "".join( [ top_right, center, bottom_left ] )
-    return ( word1 == word or word1 == backwards ) and ( word2 == word or word2 == backwards )
-
-def do_problem( str_data, word = "MAS" ) :
+def get_char_grid( lines, padding = 0 ) :
+    # grid of characters (bytes), surrounded by padding cells of 0, which match no letter
+    lines = [ line.strip() for line in lines if line.strip() != "" ]
+    grid = np.frombuffer( "".join( lines ).encode(), dtype = np.uint8 ).reshape( len( lines ), -1 )
+    return np.pad( grid, padding )
+
+def get_stencil( pattern ) :
+    # (row, col, char) for each letter of a small pattern, "." matches anything
+    # positions are relative to the center of the pattern
+    rows = pattern.split( "\n" )
+    center_row, center_col = len( rows ) // 2, len( rows[0] ) // 2
+    return [ ( row - center_row, col - center_col, ord( c ) )
+            for row, line in enumerate( rows ) for col, c in enumerate( line ) if c != "." ]
+
+def get_x_stencils( word ) :
+    # the word on both diagonals of a square, forwards or backwards (4 patterns)
+    size = len( word )
+    backwards = "".join( reversed( word ) )
+    stencils = []
+    for diagonal_1 in ( word, backwards ) :
+        for diagonal_2 in ( word, backwards ) :
+            cells = [ [ "." ] * size for _ in range( size ) ]
+            for i in range( size ) :
+                cells[ i ][ i ] = diagonal_1[ i ]
+                cells[ size - 1 - i ][ i ] = diagonal_2[ i ]
+            stencil = get_stencil( "\n".join( "".join( row ) for row in cells ) )
+            # a palindrome gives the same pattern more than once
+            if stencil not in stencils :
+                stencils.append( stencil )
+    return stencils
+
+def count_stencils( lines, stencils, verbose = False ) :
+    # a stencil is found around a cell if the views shifted by each of its positions all have its letters
+    padding = max( max( abs( row ), abs( col ) ) for stencil in stencils for row, col, _ in stencil )
+    grid = get_char_grid( lines, padding )
+    height, width = grid.shape[0] - 2 * padding, grid.shape[1] - 2 * padding
     count = 0
-    center = word[ 1 ] # "A"
-    lines = [ line.strip() for line in str_data ]
-    for row in range( 1, len( lines ) - 1 ) :
-        for col in range( 1, len( lines[ row ] ) - 1 ) :
-            if lines[ row ][ col ] == center :
-                if is_x_mas( lines, row, col, word ) :
-                    count += 1
+    for i, stencil in enumerate( stencils ) :
+        mask = np.ones( ( height, width ), dtype = bool )
+        for row, col, c in stencil :
+            mask &= grid[ padding + row:padding + row + height, padding + col:padding + col + width ] == c
+        if verbose :
+            print( f"Found with stencil #{i}: {int( np.count_nonzero( mask ) )}" )
+        count += int( np.count_nonzero( mask ) )
+    return count
+
+def do_problem( str_data, word = "MAS", verbose = False ) :
+    # the stencils are all different: at most one of them matches around a cell
+    count = count_stencils( str_data, get_x_stencils( word ), verbose )
     print( f"Total X-MAS found: {count}" )
 
 def do_tests() :
     str_data = get_file_content( get_test_file_path(), True )
-    do_problem( str_data )
+    do_problem( str_data, verbose = True )
 
 def do_input() :
     str_data = get_file_content( get_input_file_path(), True )
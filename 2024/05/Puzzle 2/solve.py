@@ -2,6 +2,7 @@
 
 import time
 import re
+import heapq
 
 def get_test_file_path() :
     return "tests.txt"
@@ -52,11 +53,9 @@ def parse_data( lines ) :
             continue
     return pages_before, page_sequences
 
-def first_intersect( list_a, list_b ) :
-    for a in list_a :
-        if a in list_b :
-            return a
-    return None
+def get_rules( pages_before ) :
+    # set of ( page before, page after ) pairs: each check is a single lookup
+    return { ( before, page ) for page, befores in pages_before.items() for before in befores }
 
 def get_median( numbers ) :
     if len( numbers ) == 0 :
@@ -68,73 +67,70 @@ def get_median( numbers ) :
         b = numbers[ len( numbers ) // 2 ]
         return ( a + b ) / 2
 
-def check_sequence( pages_before, sequence, fix = False ) :
-    is_valid = True
-    valid_start_sequence = sequence
-    remaining_sequence = []
-    next_expected_page = None
+def check_sequence( rules, sequence, verbose = False ) :
+    # each pair of pages of the sequence is checked once, against the rules
     for j, page in enumerate( sequence ) :
-        # checking that the next sequence don't contain a page that should be BEFORE this page number
-        if page in pages_before :
-            x = first_intersect( sequence[j+1:], pages_before[ page ] )
-            if x is not None :
-                print( f"{sequence} is an INVALID page sequence: {x} should be BEFORE {page}" )
-                is_valid = False
-                valid_start_sequence = sequence[:j]
-                remaining_sequence = sequence[j:]
-                next_expected_page = x
-                break
-    if is_valid :
+        for next_page in sequence[ j+1: ] :
+            if ( next_page, page ) in rules :
+                if verbose :
+                    print( f"{sequence} is an INVALID page sequence: {next_page} should be BEFORE {page}" )
+                return False
+    if verbose :
         print( f"{sequence} is a VALID page sequence" )
-    if fix :
-        return is_valid, valid_start_sequence, remaining_sequence, next_expected_page
-    else :
-        return is_valid
-
-def get_invalid_sequences( pages_before, page_sequences ) :
-    invalid_sequences = []
-    print()
-    print( "Checking page sequences" )
-    count_valid = 0
-    sum_middle_page = 0
+    return True
+
+def sort_sequence( rules, sequence ) :
+    # Kahn's algorithm, with the rules between the pages of the sequence only
+    # pages not ordered by the rules keep their order in the sequence
+    nb_before = [ 0 ] * len( sequence )
+    next_pages = [ [] for _ in sequence ]
+    for i, page in enumerate( sequence ) :
+        for j, other_page in enumerate( sequence ) :
+            if ( page, other_page ) in rules :
+                next_pages[ i ].append( j )
+                nb_before[ j ] += 1
+    to_visit = [ i for i in range( len( sequence ) ) if nb_before[ i ] == 0 ]
+    heapq.heapify( to_visit )
+    sorted_sequence = []
+    while len( to_visit ) > 0 :
+        i = heapq.heappop( to_visit )
+        sorted_sequence.append( sequence[ i ] )
+        for j in next_pages[ i ] :
+            nb_before[ j ] -= 1
+            if nb_before[ j ] == 0 :
+                heapq.heappush( to_visit, j )
+    if len( sorted_sequence ) < len( sequence ) :
+        raise ValueError( f"The rules are cyclic for the pages of {sequence}" )
+    return sorted_sequence
+
+def sort_sequences( rules, page_sequences, verbose = False ) :
+    # one pass on all the sequences: valid ones are kept, invalid ones are sorted
+    valid_sequences = []
+    fixed_sequences = []
     for sequence in page_sequences :
-        if check_sequence( pages_before, sequence ) :
-            count_valid += 1
-            sum_middle_page += get_median( sequence )
+        if check_sequence( rules, sequence, verbose ) :
+            valid_sequences.append( sequence )
         else :
-            invalid_sequences.append( sequence )
-    print( f"{count_valid} valid sequences found out of {len(page_sequences)}" )
-    print( f"Sum of middle page numbers: {sum_middle_page}" )
-    return invalid_sequences
-
-def fix_sequence( pages_before, sequence ) :
-    is_valid, valid_start_sequence, remaining_sequence, next_expected_page = check_sequence( pages_before, sequence, fix=True )
-    valid_sequence = valid_start_sequence
-    while not is_valid :
-        end_sequence = []
-        while next_expected_page in remaining_sequence :
-            end_sequence.append( remaining_sequence.pop( remaining_sequence.index( next_expected_page ) ) )
-        end_sequence += remaining_sequence
-        is_valid, valid_start_sequence, remaining_sequence, next_expected_page = check_sequence( pages_before, end_sequence, fix=True )
-        valid_sequence += valid_start_sequence
-    return valid_sequence
-
-def do_problem( str_data ) :
+            fixed_sequence = sort_sequence( rules, sequence )
+            if verbose :
+                print( f"=> VALID sequence {fixed_sequence}" )
+            fixed_sequences.append( fixed_sequence )
+    return valid_sequences, fixed_sequences
+
+def do_problem( str_data, verbose = False ) :
     pages_before, page_sequences = parse_data( str_data )
-    invalid_sequences = get_invalid_sequences( pages_before, page_sequences )
+    rules = get_rules( pages_before )
     print()
-    print( f"{len(invalid_sequences)} invalid sequences to fix..." )
-    fixed_sequences = []
-    for sequence in invalid_sequences :
-        print( f"Invalid sequence {sequence}" )
-        fixed_sequence = fix_sequence( pages_before, sequence )
-        print( f"=> VALID sequence {fixed_sequence}" )
-        fixed_sequences.append( fixed_sequence )
+    print( "Checking and fixing page sequences" )
+    valid_sequences, fixed_sequences = sort_sequences( rules, page_sequences, verbose )
+    print( f"{len(valid_sequences)} valid sequences found out of {len(page_sequences)}" )
+    print( f"Sum of middle page numbers: {sum( get_median( sequence ) for sequence in valid_sequences )}" )
     print()
-    print( "Check and middle value sum..." )
-    invalid_sequences = get_invalid_sequences( pages_before, fixed_sequences )
+    print( f"{len(fixed_sequences)} invalid sequences fixed" )
+    invalid_sequences = [ sequence for sequence in fixed_sequences if not check_sequence( rules, sequence ) ]
     if len( invalid_sequences ) == 0 :
         print( "ALL DONE!" )
+        print( f"Sum of middle page numbers: {sum( get_median( sequence ) for sequence in fixed_sequences )}" )
     else :
         print( f"ERROR! {len(invalid_sequences)} INVALID SEQUENCES REMAINING..." )
         for s in invalid_sequences :
@@ -142,7 +138,7 @@ def do_problem( str_data ) :
 
 def do_tests() :
     str_data = get_file_content( get_test_file_path(), True )
-    do_problem( str_data )
+    do_problem( str_data, True )
 
 def do_input() :
     str_data = get_file_content( get_input_file_path(), True )
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 import time
-from itertools import combinations
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -40,47 +40,41 @@ def parse_data( str_data, print_grid = False ) :
         print( f"- {f}, {len(frequencies[f])} antenna(s): {frequencies[f]}" )
     return grid, frequencies
 
-def is_in_grid( grid, position ) :
-    row, col = position
-    if row < 0 or col < 0 :
-        return False
-    if row >= len( grid ) :
-        return False
-    if col >= len( grid[ row ] ) :
-        return False
-    return True
+def mark_frequency_antinodes( antinodes, antennas, reduce = True, max_points = 1 << 22 ) :
+    """
+    Marks the antinodes of a frequency in a boolean grid, for all pairs of antennas at once
 
-def antennas_antinodes( grid, antenna_1, antenna_2 ) :
-    #print( f"Calculating antinodes between antennas {antenna_1} and {antenna_2}" )
-    antinodes = set()
-    vector = tuple( [ c2-c1 for c1, c2 in zip( antenna_1, antenna_2 ) ] ) # vector to go from antenna 1 to 2
-    # antinodes starting from antenna_2, away from antenna_1
-    antinode = antenna_2
-    while is_in_grid( grid, antinode ) :
-        antinodes.add( antinode )
-        antinode = tuple( c+v for c, v in zip( antinode, vector ) )
-    # antinodes starting from antenna_1, away from antenna_2
-    antinode = antenna_1
-    while is_in_grid( grid, antinode ) :
-        antinodes.add( antinode )
-        antinode = tuple( c-v for c, v in zip( antinode, vector ) )
-    print( f"Antinodes between antennas {antenna_1} and {antenna_2}: {len(antinodes)}" )
+    The vector between 2 antennas is divided by the gcd of its coordinates:
+    every grid position in line with the antennas is a multiple of the reduced vector.
+    All the multiples are generated by broadcasting, and the ones in the grid are marked.
+    Pairs are processed in chunks, to keep at most max_points positions in memory.
+    """
+    height, width = antinodes.shape
+    antennas = np.array( antennas, dtype = np.int64 ).reshape( -1, 2 )
+    firsts, seconds = np.triu_indices( len( antennas ), 1 )
+    vectors = antennas[ seconds ] - antennas[ firsts ]
+    if reduce :
+        vectors //= np.gcd( vectors[ :, 0 ], vectors[ :, 1 ] )[ :, None ]
+    # pairs are grouped by the number of steps needed to cross the grid from an antenna
+    max_steps = ( max( height, width ) - 1 ) // np.abs( vectors ).max( axis = 1 )
+    for nb_steps in np.unique( max_steps ) :
+        pairs = np.flatnonzero( max_steps == nb_steps )
+        steps = np.arange( -nb_steps, nb_steps + 1 )
+        chunk_size = max( 1, max_points // len( steps ) )
+        for start in range( 0, len( pairs ), chunk_size ) :
+            chunk = pairs[ start:start + chunk_size ]
+            positions = antennas[ firsts[ chunk ] ][ :, None, : ] + steps[ None, :, None ] * vectors[ chunk, None, : ]
+            rows, cols = positions[ ..., 0 ], positions[ ..., 1 ]
+            in_grid = ( rows >= 0 ) & ( rows < height ) & ( cols >= 0 ) & ( cols < width )
+            antinodes[ rows[ in_grid ], cols[ in_grid ] ] = True
     return antinodes
 
-def frequency_antinodes( grid, antennas, frequency ) :
-    print( f"Calculating antinodes for frequency {frequency}" )
-    antinodes = set()
-    for antenna_1, antenna_2 in combinations( antennas, 2 ) :
-        antinodes = antinodes | antennas_antinodes( grid, antenna_1, antenna_2 )
-    print( f"Antinodes for frequency {frequency}: {len(antinodes)}" )
-    return antinodes
-
-def do_problem( str_data ) :
+def do_problem( str_data, reduce = True ) :
     grid, frequencies = parse_data( str_data, True )
-    antinodes = set()
+    antinodes = np.zeros( ( len( grid ), len( grid[0] ) ), dtype = bool )
     for f in frequencies :
-        antinodes = antinodes | frequency_antinodes( grid, frequencies[ f ], f )
-    print( f"Total number of antinodes: {len(antinodes)}" )
+        mark_frequency_antinodes( antinodes, frequencies[ f ], reduce )
+    print( f"Total number of antinodes: {int( np.count_nonzero( antinodes ) )}" )
 
 def do_tests() :
     str_data = get_file_content( get_test_file_path(), True )
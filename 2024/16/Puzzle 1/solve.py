@@ -22,6 +22,11 @@ Vector = namedtuple( "Vector", [ "dx", "dy" ] )
 State = namedtuple( "State", [ "coord", "dir" ] )
 Node = namedtuple( "Node", [ "estimated_cost", "heuristic_to_end", "cost_from_start", "from_state", "state" ] )
 Maze = namedtuple( "Maze", [ "width", "height", "tiles", "start", "end" ] )
+# a corridor of the maze collapsed into a single weighted edge between two junctions
+# start: junction + direction used to leave it, end: junction + direction used to enter it
+Edge = namedtuple( "Edge", [ "start", "end", "steps", "turns", "tiles" ] )
+# the maze compressed into a weighted junction graph
+Graph = namedtuple( "Graph", [ "maze", "junctions", "edges" ] )
 
 # the directions expressed as characters (to represent them in the maze)
 DIR_REPR = ( ">", "^", "<", "v" )
@@ -188,20 +193,162 @@ def trace_path( end_node: Node, closed_set: dict[ State, Node ],
     path.reverse() # reverse to get the path from start to end
     return path
 
-def do_problem( str_data, verbose = False ) :
+def get_open_directions( coord: Coordinate, maze: Maze ) -> list[ int ] :
+    # the directions (as indexes in DIR_VECTORS) leading to a non-wall tile
+    return [
+        dir for dir, vector in enumerate( DIR_VECTORS )
+        if Coordinate( coord.x + vector.dx, coord.y + vector.dy ) in maze.tiles
+    ]
+
+def get_turn_cost( from_dir: int, to_dir: int ) -> int :
+    # nb of 90° turns to go from one direction to another (0, 1 or 2) times the cost of a turn
+    delta = ( to_dir - from_dir ) % len( DIR_VECTORS )
+    return min( delta, len( DIR_VECTORS ) - delta ) * COST_TURN
+
+def get_edge_cost( edge: Edge ) -> int :
+    return edge.steps * COST_STEP + edge.turns * COST_TURN
+
+def follow_corridor( start: State, junctions: set[ Coordinate ], maze: Maze,
+                    verbose: bool = False ) -> Edge :
+    # walk from a junction in the given direction until another junction is reached
+    # every tile in between has exactly 2 open directions: the one we come from and the next one
+    coord, dir = start
+    tiles = [ coord ]
+    steps, turns = 0, 0
+    while True :
+        vector = DIR_VECTORS[ dir ]
+        coord = Coordinate( coord.x + vector.dx, coord.y + vector.dy )
+        tiles.append( coord )
+        steps += 1
+        if coord in junctions :
+            break
+        back_dir = ( dir + 2 ) % len( DIR_VECTORS )
+        next_dir = [ d for d in get_open_directions( coord, maze ) if d != back_dir ][0]
+        if next_dir != dir :
+            turns += 1
+            dir = next_dir
+    return Edge( start, State( coord, dir ), steps, turns, tuple( tiles ) )
+
+def compress_maze( maze: Maze, verbose: bool = False ) -> Graph :
+    # junctions are the tiles that are not in the middle of a corridor
+    # (dead ends, crossings...) plus the start and the end of the maze
+    junctions = { maze.start.coord, maze.end }
+    for coord in maze.tiles :
+        if len( get_open_directions( coord, maze ) ) != 2 :
+            junctions.add( coord )
+    edges: dict[ Coordinate, list[ Edge ] ] = dict()
+    for junction in junctions :
+        edges[ junction ] = [
+            follow_corridor( State( junction, dir ), junctions, maze, verbose )
+            for dir in get_open_directions( junction, maze )
+        ]
+    nb_edges = sum( len( junction_edges ) for junction_edges in edges.values() )
+    print( f"Maze compressed: {len(maze.tiles)} tiles -> {len(junctions)} junctions, {nb_edges} edges" )
+    return Graph( maze, junctions, edges )
+
+def get_graph_neighbours( state: State, graph: Graph,
+                         verbose: bool = False ) -> list[ tuple[ State, int ] ] :
+    # from a junction, we can turn in place then follow any corridor to the next junction
+    return [
+        ( edge.end, get_turn_cost( state.dir, edge.start.dir ) + get_edge_cost( edge ) )
+        for edge in graph.edges[ state.coord ]
+    ]
+
+def get_incoming_edge( from_state: State, state: State, graph: Graph ) -> Edge :
+    # the direction used to enter a junction identifies the corridor we come from
+    return [ edge for edge in graph.edges[ from_state.coord ] if edge.end == state ][0]
+
+def make_graph_node( state: State, maze: Maze, from_node: Node = None, move_cost: int = 0,
+                    verbose: bool = False ) -> Node :
+    heuristic_to_end = heuristic( state, maze, verbose )
+    if from_node is not None :
+        from_state = from_node.state
+        cost_from_start = from_node.cost_from_start + move_cost
+    else :
+        # starting node
+        from_state = None
+        cost_from_start = 0
+    estimated_cost = cost_from_start + heuristic_to_end
+    return Node( estimated_cost, heuristic_to_end, cost_from_start, from_state, state )
+
+def a_star_graph( graph: Graph, starting_state: State = None,
+                 verbose: bool = False ) -> tuple[ list[ State ], int ] :
+    # same search as a_star, but only junctions are visited
+    # and corridors are crossed in a single move
+    maze = graph.maze
+    if starting_state is None :
+        starting_state = maze.start
+    open_set = { starting_state: make_graph_node( starting_state, maze, None, 0, verbose ) }
+    closed_set = dict()
+    print( f"Searching for a path from @{starting_state.coord} to @{maze.end} (compressed maze)" )
+    while len( open_set ) > 0 :
+        open_set, current_node = get_next_open_node( open_set )
+        closed_set[ current_node.state ] = current_node
+        if current_node.state.coord == maze.end :
+            print( f"End reached @{maze.end}, direction: {DIR_REPR[current_node.state.dir]}" )
+            print( f"Cost to reach the end: {current_node.cost_from_start}" )
+            path = trace_graph_path( current_node, closed_set, graph, verbose )
+            return path, current_node.cost_from_start
+        for neighbour_state, move_cost in get_graph_neighbours( current_node.state, graph, verbose ) :
+            if neighbour_state in closed_set :
+                continue
+            node = make_graph_node( neighbour_state, maze, current_node, move_cost, verbose )
+            if neighbour_state not in open_set or node.estimated_cost < open_set[ neighbour_state ].estimated_cost :
+                open_set[ neighbour_state ] = node
+    print( f"UNABLE TO FIND A PATH!!!" )
+    return None, None
+
+def get_turn_states( coord: Coordinate, from_dir: int, to_dir: int ) -> list[ State ] :
+    # the states crossed when turning in place, by +/-90° steps, the last one facing to_dir
+    delta = ( to_dir - from_dir ) % len( DIR_VECTORS )
+    turn = -1 if delta == 3 else +1
+    states = []
+    dir = from_dir
+    while dir != to_dir :
+        dir = ( dir + turn ) % len( DIR_VECTORS )
+        states.append( State( coord, dir ) )
+    return states
+
+def expand_edge( edge: Edge, from_dir: int ) -> list[ State ] :
+    # back to the tiles: the turns in place (at the starting junction or in a corridor corner)
+    # then one state per tile, oriented in the direction of the move
+    states = []
+    dir = from_dir
+    for a, b in zip( edge.tiles, edge.tiles[1:] ) :
+        move_dir = DIR_VECTORS.index( Vector( b.x - a.x, b.y - a.y ) )
+        states += get_turn_states( a, dir, move_dir )
+        dir = move_dir
+        states.append( State( b, dir ) )
+    return states
+
+def trace_graph_path( end_node: Node, closed_set: dict[ State, Node ], graph: Graph,
+                     verbose: bool = False ) -> list[ State ] :
+    path = []
+    node = end_node
+    while node.from_state is not None :
+        edge = get_incoming_edge( node.from_state, node.state, graph )
+        path = expand_edge( edge, node.from_state.dir ) + path
+        node = closed_set[ node.from_state ]
+    return [ node.state ] + path
+
+def do_problem( str_data, compress = True, verbose = False ) :
     maze = parse_data( str_data, verbose )
     print_maze( maze, None, None, verbose )
-    path, cost = a_star( maze )
+    if compress :
+        graph = compress_maze( maze, verbose )
+        path, cost = a_star_graph( graph, None, verbose )
+    else :
+        path, cost = a_star( maze )
     print_maze( maze, path, cost, verbose )
     print( f"END" )
 
 def do_tests( i = None ) :
     str_data = get_file_content( get_test_file_path( i ) )
-    do_problem( str_data, True )
+    do_problem( str_data, verbose = True )
 
 def do_input() :
     str_data = get_file_content( get_input_file_path() )
-    do_problem( str_data, False )
+    do_problem( str_data, verbose = False )
 
 def main() :
     start = time.time()
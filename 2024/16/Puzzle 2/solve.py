@@ -24,6 +24,11 @@ State = namedtuple( "State", [ "coord", "dir" ] )
 Node = namedtuple( "Node", [ "estimated_cost", "heuristic_to_end", "cost_from_start", "from_set", "state" ] )
 Maze = namedtuple( "Maze", [ "width", "height", "tiles", "start", "end" ] )
 NodeDict = dict[ State, Node ]
+# a corridor of the maze collapsed into a single weighted edge between two junctions
+# start: junction + direction used to leave it, end: junction + direction used to enter it
+Edge = namedtuple( "Edge", [ "start", "end", "steps", "turns", "tiles" ] )
+# the maze compressed into a weighted junction graph
+Graph = namedtuple( "Graph", [ "maze", "junctions", "edges" ] )
 
 # the directions expressed as characters (to represent them in the maze)
 DIR_REPR = ( ">", "^", "<", "v" )
@@ -266,20 +271,160 @@ def trace_back( end_node: Node, closed_set: NodeDict,
         coords = coords | trace_back( predecessor_node, closed_set, verbose )
     return coords
 
-def do_problem( str_data, verbose = False ) :
+def get_open_directions( coord: Coordinate, maze: Maze ) -> list[ int ] :
+    # the directions (as indexes in DIR_VECTORS) leading to a non-wall tile
+    return [
+        dir for dir, vector in enumerate( DIR_VECTORS )
+        if Coordinate( coord.x + vector.dx, coord.y + vector.dy ) in maze.tiles
+    ]
+
+def get_turn_cost( from_dir: int, to_dir: int ) -> int :
+    # nb of 90° turns to go from one direction to another (0, 1 or 2) times the cost of a turn
+    delta = ( to_dir - from_dir ) % len( DIR_VECTORS )
+    return min( delta, len( DIR_VECTORS ) - delta ) * COST_TURN
+
+def get_edge_cost( edge: Edge ) -> int :
+    return edge.steps * COST_STEP + edge.turns * COST_TURN
+
+def follow_corridor( start: State, junctions: set[ Coordinate ], maze: Maze,
+                    verbose: bool = False ) -> Edge :
+    # walk from a junction in the given direction until another junction is reached
+    # every tile in between has exactly 2 open directions: the one we come from and the next one
+    coord, dir = start
+    tiles = [ coord ]
+    steps, turns = 0, 0
+    while True :
+        vector = DIR_VECTORS[ dir ]
+        coord = Coordinate( coord.x + vector.dx, coord.y + vector.dy )
+        tiles.append( coord )
+        steps += 1
+        if coord in junctions :
+            break
+        back_dir = ( dir + 2 ) % len( DIR_VECTORS )
+        next_dir = [ d for d in get_open_directions( coord, maze ) if d != back_dir ][0]
+        if next_dir != dir :
+            turns += 1
+            dir = next_dir
+    return Edge( start, State( coord, dir ), steps, turns, tuple( tiles ) )
+
+def compress_maze( maze: Maze, verbose: bool = False ) -> Graph :
+    # junctions are the tiles that are not in the middle of a corridor
+    # (dead ends, crossings...) plus the start and the end of the maze
+    junctions = { maze.start.coord, maze.end }
+    for coord in maze.tiles :
+        if len( get_open_directions( coord, maze ) ) != 2 :
+            junctions.add( coord )
+    edges: dict[ Coordinate, list[ Edge ] ] = dict()
+    for junction in junctions :
+        edges[ junction ] = [
+            follow_corridor( State( junction, dir ), junctions, maze, verbose )
+            for dir in get_open_directions( junction, maze )
+        ]
+    nb_edges = sum( len( junction_edges ) for junction_edges in edges.values() )
+    print( f"Maze compressed: {len(maze.tiles)} tiles -> {len(junctions)} junctions, {nb_edges} edges" )
+    return Graph( maze, junctions, edges )
+
+def get_graph_neighbours( state: State, graph: Graph,
+                         verbose: bool = False ) -> list[ tuple[ State, int ] ] :
+    # from a junction, we can turn in place then follow any corridor to the next junction
+    return [
+        ( edge.end, get_turn_cost( state.dir, edge.start.dir ) + get_edge_cost( edge ) )
+        for edge in graph.edges[ state.coord ]
+    ]
+
+def get_incoming_edge( from_state: State, state: State, graph: Graph ) -> Edge :
+    # the direction used to enter a junction identifies the corridor we come from
+    return [ edge for edge in graph.edges[ from_state.coord ] if edge.end == state ][0]
+
+def make_graph_node( state: State, maze: Maze, from_node: Node = None, move_cost: int = 0,
+                    heuristic: Callable[ [State, Maze, bool], int ] = heuristic_full,
+                    verbose: bool = False ) -> Node :
+    heuristic_to_end = heuristic( state, maze, verbose )
+    from_set = set()
+    if from_node is not None :
+        from_set.add( from_node.state )
+        cost_from_start = from_node.cost_from_start + move_cost
+    else :
+        # starting node
+        # from_set is empty set
+        cost_from_start = 0
+    estimated_cost = cost_from_start + heuristic_to_end
+    return Node( estimated_cost, heuristic_to_end, cost_from_start, from_set, state )
+
+def a_star_graph( graph: Graph, starting_state: State = None,
+                 heuristic: Callable[ [State, Maze, bool], int ] = heuristic_full,
+                 verbose: bool = False ) -> tuple[ set[ Coordinate ], int, NodeDict ] :
+    # same search as a_star, but only junctions are visited
+    # and corridors are crossed in a single move
+    maze = graph.maze
+    if starting_state is None :
+        starting_state = maze.start
+    open_set = NodeDict()
+    open_set[ starting_state ] = make_graph_node( starting_state, maze, None, 0, heuristic, verbose )
+    closed_set = NodeDict()
+    print( f"Searching for all shortest paths from @{starting_state.coord} to @{maze.end} (compressed maze)" )
+    cost_start_to_end = float('inf')
+    end_nodes = []
+    while len( open_set ) > 0 :
+        open_set, current_node = get_next_open_node( open_set )
+        if current_node.estimated_cost > cost_start_to_end :
+            # every remaining node is more costly than the shortest path already found
+            break
+        closed_set[ current_node.state ] = current_node
+        if current_node.state.coord == maze.end :
+            # the end is reached: no need to go further from here
+            cost_start_to_end = current_node.cost_from_start
+            end_nodes.append( current_node )
+            continue
+        for neighbour_state, move_cost in get_graph_neighbours( current_node.state, graph, verbose ) :
+            node = make_graph_node( neighbour_state, maze, current_node, move_cost, heuristic, verbose )
+            if neighbour_state in closed_set :
+                # an alternative path with the same cost to an already processed junction
+                if node.estimated_cost == closed_set[ neighbour_state ].estimated_cost :
+                    closed_set[ neighbour_state ] = merge_nodes( closed_set[ neighbour_state ], node, verbose )
+            elif neighbour_state not in open_set or node.estimated_cost < open_set[ neighbour_state ].estimated_cost :
+                open_set[ neighbour_state ] = node
+            elif node.estimated_cost == open_set[ neighbour_state ].estimated_cost :
+                open_set[ neighbour_state ] = merge_nodes( open_set[ neighbour_state ], node, verbose )
+    print( f"End of shortest path search" )
+    visited = get_visited_graph_tiles( end_nodes, closed_set, graph, verbose )
+    return visited, cost_start_to_end, closed_set
+
+def get_visited_graph_tiles( end_nodes: list[ Node ], closed_set: NodeDict, graph: Graph,
+                            verbose: bool = False ) -> set[ Coordinate ] :
+    # back to the tiles: every tile of every corridor used by a shortest path
+    coords = set()
+    to_trace = [ node.state for node in end_nodes ]
+    traced = set()
+    while len( to_trace ) > 0 :
+        state = to_trace.pop()
+        if state in traced :
+            continue
+        traced.add( state )
+        coords.add( state.coord )
+        for from_state in closed_set[ state ].from_set :
+            coords.update( get_incoming_edge( from_state, state, graph ).tiles )
+            to_trace.append( from_state )
+    return coords
+
+def do_problem( str_data, compress = True, verbose = False ) :
     maze = parse_data( str_data, verbose )
     print_maze( maze, None, None, None, True )
-    visited, cost, closed = a_star( maze, heuristic=heuristic_full, verbose=verbose )
+    if compress :
+        graph = compress_maze( maze, verbose )
+        visited, cost, closed = a_star_graph( graph, heuristic=heuristic_full, verbose=verbose )
+    else :
+        visited, cost, closed = a_star( maze, heuristic=heuristic_full, verbose=verbose )
     print_maze( maze, visited, cost, closed, False )
     print( f"END" )
 
 def do_tests( i = None ) :
     str_data = get_file_content( get_test_file_path( i ) )
-    do_problem( str_data, True )
+    do_problem( str_data, verbose = True )
 
 def do_input() :
     str_data = get_file_content( get_input_file_path() )
-    do_problem( str_data, False )
+    do_problem( str_data, verbose = False )
 
 def main() :
     start = time.time()
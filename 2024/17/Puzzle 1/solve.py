@@ -4,6 +4,7 @@ import time
 from collections import namedtuple
 import re
 from typing import Callable
+from functools import cache
 
 def get_test_file_path( i = None ) :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -24,6 +25,8 @@ class Computer:
         self.__program: tuple[int] = tuple( int(s) for s in program.split( "," ) )
         self.__output: list[int] = []
         self.__curser: int = 0
+        # the methods of the instructions, by opcode
+        self.__methods = ( self.adv, self.bxl, self.bst, self.jnz, self.bxc, self.out, self.bdv, self.cdv )
 
     @property
     def program( self ) -> str:
@@ -118,10 +121,9 @@ class Computer:
         Returns:
             ((Computer, int) -> None): the method to call to execute the instruction
         """
-        methods = ( self.adv, self.bxl, self.bst, self.jnz, self.bxc, self.out, self.bdv, self.cdv )
-        if instruction < 0 or instruction >= len( methods ) :
+        if instruction < 0 or instruction >= len( self.__methods ) :
             raise ValueError( f"Invalid instruction value {instruction}" )
-        return methods[ instruction ]
+        return self.__methods[ instruction ]
 
     def __combo( self, combo_operand: int ) -> int :
         """
@@ -299,6 +301,105 @@ class Computer:
         """
         self.c = self.__divide_a( self.__combo( operand ) )
 
+# the program compiler is owned by Puzzle 2, where test_compiler checks it against the interpreter:
+# this copy is the same without the run limits, each puzzle script being standalone
+COMBO_OPERANDS = ( "0", "1", "2", "3", "A", "B", "C" )
+
+def get_compiled_combo( operand: int ) -> str :
+    if operand < 0 or operand >= len( COMBO_OPERANDS ) :
+        return None
+    return COMBO_OPERANDS[ operand ]
+
+def get_compiled_instruction( instruction: int, operand: int ) -> list[str] :
+    # Python lines for an instruction (except jnz, which ends a block)
+    combo = get_compiled_combo( operand )
+    if instruction in ( 0, 2, 5, 6, 7 ) and combo is None :
+        # same error as the interpreter, raised only if the instruction is reached
+        return [ f"raise ValueError( 'Invalid value {operand} for combo operand' )" ]
+    if instruction == 0 :
+        return [ f"A = A >> {combo}" ]
+    elif instruction == 1 :
+        return [ f"B = B ^ {operand}" ]
+    elif instruction == 2 :
+        return [ f"B = {combo} & 7" ]
+    elif instruction == 4 :
+        return [ "B = B ^ C" ]
+    elif instruction == 5 :
+        return [ f"out.append( {combo} & 7 )" ]
+    elif instruction == 6 :
+        return [ f"B = A >> {combo}" ]
+    elif instruction == 7 :
+        return [ f"C = A >> {combo}" ]
+    raise ValueError( f"Invalid instruction value {instruction}" )
+
+def get_block_starts( program: tuple[int] ) -> list[int] :
+    # a block of instructions starts at 0, at each jump target, and after each jnz
+    # (jump targets may be odd: the program is then read from an odd position)
+    starts = set()
+    to_explore = [ 0 ]
+    while len( to_explore ) > 0 :
+        curser = to_explore.pop()
+        if curser in starts or curser >= len( program ) - 1 :
+            continue
+        starts.add( curser )
+        while curser < len( program ) - 1 :
+            if program[ curser ] == 3 :
+                to_explore += [ program[ curser + 1 ], curser + 2 ]
+                break
+            curser += 2
+    return sorted( starts )
+
+@cache
+def compile_program( program: str ) -> Callable[ [int, int, int], list[int] ] :
+    """
+    Translates a program into a Python function, compiled once per program string
+
+    The function runs the program for the given registers and returns the output values.
+    Each block of instructions between jumps becomes straight Python code,
+    and the blocks are chained through the curser value.
+
+    Args:
+        program (str): the program string of instructions and operands, joined with commas
+
+    Returns:
+        ((int, int, int) -> list[int]): the function run( A, B = 0, C = 0 ) of the program
+    """
+    instructions = tuple( int(s) for s in program.split( "," ) )
+    starts = get_block_starts( instructions )
+    code = [
+        "def run( A, B = 0, C = 0 ) :",
+        "    out = []",
+        "    curser = 0",
+        "    while True :",
+    ]
+    for i, start in enumerate( starts ) :
+        code.append( f"        {'if' if i == 0 else 'elif'} curser == {start} :" )
+        curser = start
+        while True :
+            if curser >= len( instructions ) - 1 :
+                # end of the program
+                code.append( f"            return out" )
+                break
+            if curser != start and curser in starts :
+                # the next block follows this one
+                code.append( f"            curser = {curser}" )
+                break
+            instruction, operand = instructions[ curser ], instructions[ curser + 1 ]
+            if instruction == 3 :
+                code.append( f"            curser = {operand} if A != 0 else {curser + 2}" )
+                break
+            code += [ "            " + line for line in get_compiled_instruction( instruction, operand ) ]
+            curser += 2
+    code.append( "        else :" )
+    code.append( "            return out" )
+    context = {}
+    exec( "\n".join( code ), context )
+    return context[ "run" ]
+
+def run_compiled( program: str, A: int, B: int = 0, C: int = 0 ) -> str :
+    """Runs the compiled program, with the same output string as Computer.run_program"""
+    return ",".join( str(i) for i in compile_program( program )( A, B, C ) )
+
 REGISTER_RE = re.compile( r"Register (?P<name>\w+): (?P<value>\d+)" )
 PROGRAM_RE = re.compile( r"Program: (?P<program>[0-7](?:,[0-7])*)" )
 
@@ -326,9 +427,12 @@ def parse_data( str_data: str, verbose: bool = False ) :
     computer.print()
     return computer
 
-def do_problem( str_data: str, verbose = False ) :
+def do_problem( str_data: str, compiled: bool = True, verbose = False ) :
     computer = parse_data( str_data, verbose )
-    output = computer.run_program( verbose )
+    if compiled :
+        output = run_compiled( computer.program, computer.a, computer.b, computer.c )
+    else :
+        output = computer.run_program( verbose )
     if verbose :
         computer.print()
     print( f"Program output: {output}" )
@@ -336,11 +440,11 @@ def do_problem( str_data: str, verbose = False ) :
 
 def do_tests( i = None ) :
     str_data = get_file_content( get_test_file_path( i ) )
-    do_problem( str_data, True )
+    do_problem( str_data, verbose = True )
 
 def do_input() :
     str_data = get_file_content( get_input_file_path() )
-    do_problem( str_data, False )
+    do_problem( str_data, verbose = False )
 
 def test_computer() :
     computer = Computer( 15, 0, 0, "1,6" )
@@ -4,6 +4,10 @@ import time
 from collections import namedtuple
 import re
 from typing import Callable
+from functools import cache, partial
+import random
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 def get_test_file_path( i = None ) :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -24,6 +28,8 @@ class Computer:
         self.__program: tuple[int] = tuple( int(s) for s in program.split( "," ) )
         self.__output: list[int] = []
         self.__curser: int = 0
+        # the methods of the instructions, by opcode
+        self.__methods = ( self.adv, self.bxl, self.bst, self.jnz, self.bxc, self.out, self.bdv, self.cdv )
 
     @property
     def program( self ) -> str:
@@ -118,10 +124,9 @@ class Computer:
         Returns:
             ((Computer, int) -> None): the method to call to execute the instruction
         """
-        methods = ( self.adv, self.bxl, self.bst, self.jnz, self.bxc, self.out, self.bdv, self.cdv )
-        if instruction < 0 or instruction >= len( methods ) :
+        if instruction < 0 or instruction >= len( self.__methods ) :
             raise ValueError( f"Invalid instruction value {instruction}" )
-        return methods[ instruction ]
+        return self.__methods[ instruction ]
 
     def __combo( self, combo_operand: int ) -> int :
         """
@@ -299,141 +304,122 @@ class Computer:
         """
         self.c = self.__divide_a( self.__combo( operand ) )
 
-REGISTER_RE = re.compile( r"Register (?P<name>\w+): (?P<value>\d+)" )
-PROGRAM_RE = re.compile( r"Program: (?P<program>[0-7](?:,[0-7])*)" )
-
-def get_combo_operand( operand ) :
-    if operand < 0 or operand > 6 :
-        raise ValueError( f"Invalid value {operand} for combo operand: must be between 0 and 6" )
-    return '0123ABC'[ operand ]
+# the program compiler (Puzzle 1 has a copy of it, without the run limits)
+COMBO_OPERANDS = ( "0", "1", "2", "3", "A", "B", "C" )
 
-CodeJump = namedtuple( "CodeJump", [ "from_address", "to_address", "insert_lines_before" ] )
-
-def indent_code( code : list, jump: CodeJump, verbose: bool = False ) :
-    new_code = []
-    start_address = min( jump.from_address, jump.to_address )
-    end_address = max( jump.to_address, jump.from_address )
-    for address, group_lines in code :
-        if verbose :
-            print( f"@{address}: {group_lines}" )
-        if address >= start_address and address <= end_address :
-            for i, line in enumerate( group_lines ) :
-                if verbose :
-                    print( f"Line #{i}: {line}" )
-                group_lines[ i ] = "    " + line
-            if address == jump.to_address :
-                print( f"Adding lines before start: {jump.insert_lines_before}" )
-                group_lines = jump.insert_lines_before + group_lines
-        new_code.append( ( address, group_lines ) )
-    return new_code
-
-def get_instruction_lines( address, instruction, operand, verbose = False ) :
-    new_lines = []
-    combo = get_combo_operand( operand )
-    jump = None
+def get_compiled_combo( operand: int ) -> str :
+    if operand < 0 or operand >= len( COMBO_OPERANDS ) :
+        return None
+    return COMBO_OPERANDS[ operand ]
+
+def get_compiled_instruction( instruction: int, operand: int ) -> list[str] :
+    # Python lines for an instruction (except jnz, which ends a block)
+    combo = get_compiled_combo( operand )
+    if instruction in ( 0, 2, 5, 6, 7 ) and combo is None :
+        # same error as the interpreter, raised only if the instruction is reached
+        return [ f"raise ValueError( 'Invalid value {operand} for combo operand' )" ]
     if instruction == 0 :
-        # A = floor( A // power( 2, combo_operand ) )
-        new_lines.append( f"A = A >> {combo}" )
-        if verbose :
-            new_lines.append( f"print( '@{address}: A = A >> {combo}\t\t\tA =', A, oct(A), bin(A) )" )
+        return [ f"A = A >> {combo}" ]
     elif instruction == 1 :
-        # B = B xor literal_operand
-        new_lines.append( f"B = B ^ {operand}" )
-        if verbose :
-            new_lines.append( f"print( '@{address}: B = B ^ {operand}\t\t\tB =', B, oct(B), bin(B) )" )
+        return [ f"B = B ^ {operand}" ]
     elif instruction == 2 :
-        # B = combo_operand modulo 8
-        new_lines.append( f"B = {combo} & 7" )
-        if verbose :
-            new_lines.append( f"print( '@{address}: B = {combo} & 7\t\t\tB =', B, oct(B), bin(B) )" )
-    elif instruction == 3 :
-        # if A != 0, goto literal_operand
-        if operand < address :
-            # going backwards in the code: we do a while loop
-            loop_start_code = []
-            if verbose :
-                loop_start_code.append( f"print( '-- Start of loop --\t\tfrom  @{address} to @{operand}' )" )
-            loop_start_code.append( "while True :" )
-            jump = CodeJump( address, operand, loop_start_code )
-            # with an exit condition at the end
-            if verbose :
-                new_lines.append( f"print( '@{address}: loop test: A != 0 ?', A != 0, '\tA =', A, oct(A), bin(A) )" )
-            new_lines.append( f"if A == 0 :" )
-            if verbose :
-                new_lines.append( f"    print( '-- End of loop --\t\tfrom  @{address} to @{operand}' )" )
-            new_lines.append( f"    break" )
-            if verbose :
-                new_lines.append( f"else :" )
-                new_lines.append( f"    print( '-- Loop --\t\t\tjump to @{operand}' )" )
-        elif operand > address :
-            # going forward in the code: we do a if condition
-            jump = CodeJump( address, operand, [ f"if A != 0 :" ] )
-        else :
-            raise ValueError( f"Invalid operand {operand} for instruction {instruction} (jnz): cannot 'jump' to the current address {address} in the program" )
+        return [ f"B = {combo} & 7" ]
     elif instruction == 4 :
-        # B = B xor C
-        new_lines.append( f"B = B ^ C" )
-        if verbose :
-            new_lines.append( f"print( '@{address}: B = B ^ C\t\t\tB =', B, oct(B), bin(B) )" )
+        return [ "B = B ^ C" ]
     elif instruction == 5 :
-        # add to output: combo_operand modulo 8
-        new_lines.append( f"out.append( {combo} & 7 )" )
-        if verbose :
-            new_lines.append( f"print( '@{address}: output: {combo} & 7\t\tall outputs =', out )" )
+        return [ f"out.append( {combo} & 7 )" ]
     elif instruction == 6 :
-        # B = floor( A // power( 2, combo_operand ) )
-        new_lines.append( f"B = A >> {combo}" )
-        if verbose :
-            new_lines.append( f"print( '@{address}: B = A >> {combo}\t\t\tB =', B, oct(B), bin(B) )" )
+        return [ f"B = A >> {combo}" ]
     elif instruction == 7 :
-        # C = floor( A // power( 2, combo_operand ) )
-        new_lines.append( f"C = A >> {combo}" )
-        if verbose :
-            new_lines.append( f"print( '@{address}: C = A >> {combo}\t\t\tC =', C, oct(C), bin(C) )" )
-    else :
-        raise ValueError( f"Invalid value {instruction} for instruction: must be between 0 and 7" )
-    print( f"Block code #{address}:\n    {'\n    '.join( new_lines ) }" )
-    if jump is not None :
-        print( f"Adding {jump}" )
-    return ( new_lines, jump )
-
-def make_function( A, B, C, program, verbose = False ) :
-    print( f"Generating function for program {program}" )
-    print( f"with starting values A = {A}, B = {B}, C = {C}" )
-    if verbose :
-        print( f"and with verbose messages" )
-    prog_list = [ int(s) for s in program.split(",") ]
-    prog_code = []
-    jumps = []
-    for address in range( len(prog_list) // 2 ) :
-        instruction = prog_list[ 2*address ]
-        operand = prog_list[ 2*address + 1 ]
-        new_lines, jump = get_instruction_lines( address, instruction, operand, verbose )
-        prog_code.append( ( address, new_lines ) )
-        if jump is not None :
-            jumps.append( jump )
-    for jump in jumps :
-        prog_code = indent_code( prog_code, jump, verbose )
-    function_run_code = [
-        f"def run( A = {A}, B = {B}, C = {C} ) :",
-        f"    out = []",
+        return [ f"C = A >> {combo}" ]
+    raise ValueError( f"Invalid instruction value {instruction}" )
+
+def get_block_starts( program: tuple[int] ) -> list[int] :
+    # a block of instructions starts at 0, at each jump target, and after each jnz
+    # (jump targets may be odd: the program is then read from an odd position)
+    starts = set()
+    to_explore = [ 0 ]
+    while len( to_explore ) > 0 :
+        curser = to_explore.pop()
+        if curser in starts or curser >= len( program ) - 1 :
+            continue
+        starts.add( curser )
+        while curser < len( program ) - 1 :
+            if program[ curser ] == 3 :
+                to_explore += [ program[ curser + 1 ], curser + 2 ]
+                break
+            curser += 2
+    return sorted( starts )
+
+@cache
+def compile_program( program: str, max_outputs: int = None, max_blocks: int = None ) -> Callable[ [int, int, int], list[int] ] :
+    """
+    Translates a program into a Python function, compiled once per program string (and limits)
+
+    The function runs the program for the given registers and returns the output values.
+    Each block of instructions between jumps becomes straight Python code,
+    and the blocks are chained through the curser value.
+    With limits, the function returns None when the program, still running, has output more than
+    max_outputs values or has run more than max_blocks blocks (programs that never halt are stopped).
+
+    Args:
+        program (str): the program string of instructions and operands, joined with commas
+        max_outputs (int): maximum number of output values, None for no limit
+        max_blocks (int): maximum number of blocks run, None for no limit
+
+    Returns:
+        ((int, int, int) -> list[int]): the function run( A, B = 0, C = 0 ) of the program
+    """
+    instructions = tuple( int(s) for s in program.split( "," ) )
+    starts = get_block_starts( instructions )
+    code = [
+        "def run( A, B = 0, C = 0 ) :",
+        "    out = []",
+        "    curser = 0",
+        "    nb_blocks = 0",
+        "    while True :",
     ]
-    if verbose :
-        function_run_code.append( "    print( 'Starting values:' )" )
-        function_run_code.append( "    print( '\tA =', A )" )
-        function_run_code.append( "    print( '\tB =', B )" )
-        function_run_code.append( "    print( '\tC =', C )" )
-    for address, lines in prog_code :
-        for line in lines :
-            function_run_code.append( "    " + line )
-    function_run_code.append( "    return ','.join( str(i) for i in out )" )
-    function_run_code = '\n'.join(function_run_code)
-    #print( f"*** Function body ***\n\n{function_run_code}\n\n" )
-    #function_context = { "A": A, "B": B, "C": C }
-    function_context = {}
-    exec( function_run_code, function_context )
-    print( f"Function context content: {function_context.keys()}" )
-    return function_run_code, function_context
+    if max_blocks is not None :
+        code += [
+            "        nb_blocks += 1",
+            f"        if nb_blocks > {max_blocks} :",
+            "            return None",
+        ]
+    if max_outputs is not None :
+        code += [
+            f"        if len( out ) > {max_outputs} :",
+            "            return None",
+        ]
+    for i, start in enumerate( starts ) :
+        code.append( f"        {'if' if i == 0 else 'elif'} curser == {start} :" )
+        curser = start
+        while True :
+            if curser >= len( instructions ) - 1 :
+                # end of the program
+                code.append( f"            return out" )
+                break
+            if curser != start and curser in starts :
+                # the next block follows this one
+                code.append( f"            curser = {curser}" )
+                break
+            instruction, operand = instructions[ curser ], instructions[ curser + 1 ]
+            if instruction == 3 :
+                code.append( f"            curser = {operand} if A != 0 else {curser + 2}" )
+                break
+            code += [ "            " + line for line in get_compiled_instruction( instruction, operand ) ]
+            curser += 2
+    code.append( "        else :" )
+    code.append( "            return out" )
+    context = {}
+    exec( "\n".join( code ), context )
+    return context[ "run" ]
+
+def run_compiled( program: str, A: int, B: int = 0, C: int = 0 ) -> str :
+    """Runs the compiled program, with the same output string as Computer.run_program"""
+    return ",".join( str(i) for i in compile_program( program )( A, B, C ) )
+
+REGISTER_RE = re.compile( r"Register (?P<name>\w+): (?P<value>\d+)" )
+PROGRAM_RE = re.compile( r"Program: (?P<program>[0-7](?:,[0-7])*)" )
 
 def parse_data( str_data: str, verbose: bool = False ) :
     setup = {}
@@ -457,50 +443,210 @@ def parse_data( str_data: str, verbose: bool = False ) :
             continue
     return setup, program
 
-def solve( program : list[int], silent_run: Callable[[int, int, int], str], verbose: bool = False ) -> int :
-    # the start of the number generates the end of the output
-    # we try to solve octal by octal, adding 1 octal at a time
-    # the length of the value A written in octal, is the same as the expected output
+def get_outputs( program: str, tests: list[int], B: int = 0, C: int = 0,
+                max_outputs: int = None, max_blocks: int = None ) -> list[ list[int] ] :
+    # runs the compiled program for each value of A (compiled once per process)
+    # the output is None for the runs stopped by a limit
+    run = compile_program( program, max_outputs, max_blocks )
+    return [ run( A, B, C ) for A in tests ]
+
+def get_layer_outputs( program: str, tests: list[int], B: int = 0, C: int = 0, nb_workers: int = None,
+                      min_parallel: int = 4096, chunk_size: int = 1024,
+                      max_outputs: int = None, max_blocks: int = None ) -> list[ list[int] ] :
+    # big layers of candidates are split in chunks, run by a process pool
+    if nb_workers == 1 or len( tests ) < min_parallel :
+        return get_outputs( program, tests, B, C, max_outputs, max_blocks )
+    chunks = [ tests[i:i + chunk_size] for i in range( 0, len( tests ), chunk_size ) ]
+    with ProcessPoolExecutor( nb_workers ) as executor :
+        results = executor.map( get_outputs, repeat( program ), chunks, repeat( B ), repeat( C ),
+                               repeat( max_outputs ), repeat( max_blocks ) )
+        return [ output for chunk in results for output in chunk ]
+
+def solve_all( program: str, B: int = 0, C: int = 0, nb_workers: int = None,
+              digit_bits: int = 3, nb_layers: int = None, verbose: bool = False ) -> list[int] :
+    # search digit by digit, with integer candidates and integer outputs
+    # a digit is what A loses at each loop (3 bits, an octal, for the usual programs)
+    # the start of the number generates the end of the output:
+    # a candidate is kept if its output is the end of the expected output
+    # returns every solution with nb_layers digits (one per expected output by default), sorted
     print( f"Solving for output==program: {program}")
-    expected = program.split( "," )
-    str_candidates = set( str(i) for i in range( 1, 8 ) )
-    while len( str_candidates ) > 0 and len( min( str_candidates ) ) < len( expected ) :
-        new_candidates = set()
-        for i in range( 8 ) :
-            for c in str_candidates :
-                str_test = f"{c}{i}"
-                test = int( str_test, 8 )
-                output = silent_run( A = test )
-                match = True
-                for k, o in enumerate( reversed( output.split( "," ) ), start=1 ) :
-                    if o != expected[ -k ] :
-                        match = False
-                        break
-                if match :
-                    new_candidates.add( str_test )
-        str_candidates = new_candidates
-        print( f"for {len( min( str_candidates ) )} octals, we have {len( str_candidates )} candidate solutions" )
-    if len( str_candidates ) > 0 :
-        return int( min( str_candidates ), 8 )
-    else :
+    expected = [ int(s) for s in program.split( "," ) ]
+    if nb_layers is None :
+        nb_layers = len( expected )
+    base = 1 << digit_bits
+    candidates = [ 0 ]
+    for nb_digits in range( 1, nb_layers + 1 ) :
+        # the first digit cannot be 0
+        tests = [ candidate * base + i for candidate in candidates for i in range( base ) if candidate * base + i > 0 ]
+        outputs = get_layer_outputs( program, tests, B, C, nb_workers )
+        candidates = [ test for test, output in zip( tests, outputs )
+                      if 0 < len( output ) <= len( expected ) and output == expected[ -len( output ): ] ]
+        print( f"for {nb_digits} digits of {digit_bits} bits, we have {len( candidates )} candidate solutions" )
+        if len( candidates ) == 0 :
+            return []
+    outputs = get_outputs( program, candidates, B, C )
+    return sorted( candidate for candidate, output in zip( candidates, outputs ) if output == expected )
+
+# a term is ( A >> shift ) & ( 2**width - 1 ), with A the value at the start of the loop
+# and shift somewhere between min_shift and max_shift (width is None if nothing is masked)
+Term = namedtuple( "Term", [ "min_shift", "max_shift", "width" ] )
+# a value is a xor of terms and of a constant of const_bits bits (None if unknown)
+Value = namedtuple( "Value", [ "terms", "const_bits" ] )
+# shape of a program: is it a single loop, how many bits of A are consumed at each loop,
+# how many outputs per loop, and for each output the bits of A (start, end) it depends on
+# (shift is None if it is not constant, output_bits is None if the outputs do not depend on A only)
+ProgramShape = namedtuple( "ProgramShape", [ "is_loop", "shift", "nb_outputs", "output_bits" ] )
+
+def get_value_bits( value: Value ) -> int :
+    # maximum number of bits of a value (None if not bounded)
+    widths = [ term.width for term in value.terms ] + [ value.const_bits ]
+    return None if None in widths else max( widths )
+
+def mask_value( value: Value, nb_bits: int ) -> Value :
+    terms = tuple( Term( term.min_shift, term.max_shift, nb_bits if term.width is None else min( term.width, nb_bits ) )
+                  for term in value.terms )
+    return Value( terms, min( value.const_bits, nb_bits ) )
+
+def get_combo_value( operand: int, a_shift: int, registers: dict ) -> Value :
+    if operand < 4 :
+        return Value( (), operand.bit_length() )
+    elif operand == 4 :
+        return Value( ( Term( a_shift, a_shift, None ), ), 0 )
+    elif operand < 7 :
+        return registers[ "B" if operand == 5 else "C" ]
+    return None
+
+def get_shifted_a( a_shift: int, operand: int, shift: Value ) -> Value :
+    # A >> combo, for a literal or a bounded shift
+    if operand < 4 :
+        return Value( ( Term( a_shift + operand, a_shift + operand, None ), ), 0 )
+    nb_bits = get_value_bits( shift )
+    if nb_bits is None :
         return None
+    return Value( ( Term( a_shift, a_shift + ( 1 << nb_bits ) - 1, None ), ), 0 )
+
+def get_term_bits( value: Value ) -> tuple[int, int] :
+    # bits of A a (masked) value depends on
+    if len( value.terms ) == 0 :
+        return ( 0, 0 )
+    return ( min( term.min_shift for term in value.terms ), max( term.max_shift + term.width for term in value.terms ) )
+
+def analyse_program( program: str, verbose: bool = False ) -> ProgramShape :
+    """
+    Symbolic run of the body of a single loop program
+
+    The usual programs are one loop ending with jnz 0, consuming a few bits of A at each loop
+    and outputting values computed from the lowest bits of A.
+    B and C are followed as xors of shifted and masked slices of A,
+    to find which bits of A each output depends on.
+    """
+    values = tuple( int(s) for s in program.split( "," ) )
+    instructions = [ ( values[i], values[i + 1] ) for i in range( 0, len( values ) - 1, 2 ) ]
+    jumps = [ i for i, ( instruction, _ ) in enumerate( instructions ) if instruction == 3 ]
+    is_loop = len( values ) % 2 == 0 and jumps == [ len( instructions ) - 1 ] and instructions[ -1 ][ 1 ] == 0
+    if not is_loop :
+        return ProgramShape( False, None, 0, None )
+    nb_outputs = sum( 1 for instruction, _ in instructions if instruction == 5 )
+    a_shift = 0
+    # B and C from the previous loop are unknown
+    registers = { "B": None, "C": None }
+    output_bits = []
+    for instruction, operand in instructions[ :-1 ] :
+        combo = get_combo_value( operand, a_shift, registers ) if instruction in ( 0, 2, 5, 6, 7 ) else None
+        if instruction == 0 :
+            if operand >= 4 :
+                # A is not shifted by a constant
+                return ProgramShape( True, None, nb_outputs, None )
+            a_shift += operand
+        elif instruction == 1 :
+            B = registers[ "B" ]
+            registers[ "B" ] = None if B is None else Value( B.terms, max( B.const_bits, operand.bit_length() ) )
+        elif instruction == 2 :
+            registers[ "B" ] = None if combo is None else mask_value( combo, 3 )
+        elif instruction == 4 :
+            B, C = registers[ "B" ], registers[ "C" ]
+            registers[ "B" ] = None if B is None or C is None else Value( B.terms + C.terms, max( B.const_bits, C.const_bits ) )
+        elif instruction == 5 :
+            output_bits.append( None if combo is None else get_term_bits( mask_value( combo, 3 ) ) )
+        elif instruction in ( 6, 7 ) :
+            registers[ "B" if instruction == 6 else "C" ] = None if combo is None else get_shifted_a( a_shift, operand, combo )
+    shape = ProgramShape( True, a_shift, nb_outputs, None if None in output_bits else output_bits )
+    if verbose :
+        print( f"Program shape: {shape}" )
+    return shape
+
+def get_search_bounds( shape: ProgramShape, nb_expected: int, max_brute_force: int ) -> tuple[int, int] :
+    # a single loop with a constant shift runs once per digit of A (at least once),
+    # so the number of outputs gives the number of digits of A
+    if shape.is_loop and shape.shift == 0 :
+        # A never changes, only A = 0 halts
+        return ( 0, 1 )
+    if shape.is_loop and shape.shift is not None and shape.shift > 0 and shape.nb_outputs > 0 :
+        nb_digits = nb_expected // shape.nb_outputs
+        low = 1 << ( shape.shift * ( nb_digits - 1 ) ) if nb_digits > 1 else 0
+        return ( low, 1 << ( shape.shift * nb_digits ) )
+    return ( 0, max_brute_force )
+
+def solve_brute_force( program: str, B: int, C: int, low: int, high: int, nb_workers: int = None,
+                      chunk_size: int = 1 << 16, max_blocks: int = 100_000, verbose: bool = False ) -> list[int] :
+    # tries every value of A in [low, high[
+    # a run is stopped (and the value skipped) when it outputs more values than expected,
+    # or when it runs more than max_blocks blocks: the program may not halt for some values of A
+    expected = [ int(s) for s in program.split( "," ) ]
+    solutions = []
+    nb_stopped = 0
+    for start in range( low, high, chunk_size ) :
+        tests = list( range( start, min( start + chunk_size, high ) ) )
+        outputs = get_layer_outputs( program, tests, B, C, nb_workers,
+                                    max_outputs = len( expected ), max_blocks = max_blocks )
+        solutions += [ test for test, output in zip( tests, outputs ) if output == expected ]
+        nb_stopped += sum( 1 for output in outputs if output is None )
+    if verbose :
+        print( f"{nb_stopped} value(s) of A stopped before the end of the program" )
+    return solutions
+
+def solve_auto( program: str, B: int = 0, C: int = 0, nb_workers: int = None,
+               max_brute_force: int = 1 << 22, verbose: bool = False ) -> list[int] :
+    """
+    Picks a search from the shape of the program, returns every solution, sorted
+
+    - single loop, constant shift of A, outputs depending on A only: digit by digit search,
+      with digits as wide as the shift (octals for a shift of 3)
+    - otherwise: brute force on A, in the range given by the number of outputs if it is known,
+      or in [0, max_brute_force[ (a ValueError is raised if the range is larger than max_brute_force)
+
+    No search on wider windows of bits is needed when the outputs depend on more bits than the shift:
+    a candidate with one more digit d is A * 2**shift + d, its loops after the first one are the loops of A,
+    so its output is one more value followed by the output of A, and checking the end of the output is exact.
+    """
+    expected = [ int(s) for s in program.split( "," ) ]
+    shape = analyse_program( program, verbose )
+    if shape.is_loop and shape.shift is not None and shape.shift > 0 and shape.nb_outputs > 0 and len( expected ) % shape.nb_outputs != 0 :
+        print( f"{len( expected )} outputs cannot come from loops with {shape.nb_outputs} outputs: no solution" )
+        return []
+    if shape.is_loop and shape.shift is not None and shape.shift > 0 and shape.nb_outputs > 0 and shape.output_bits is not None :
+        if verbose :
+            window = max( end for _, end in shape.output_bits )
+            print( f"Strategy: digits of {shape.shift} bits, {shape.nb_outputs} output(s) per digit, outputs depend on the {window} lowest bits" )
+        return solve_all( program, B, C, nb_workers, digit_bits = shape.shift,
+                         nb_layers = len( expected ) // shape.nb_outputs, verbose = verbose )
+    low, high = get_search_bounds( shape, len( expected ), max_brute_force )
+    if high - low > max_brute_force :
+        raise ValueError( f"{high - low} values of A to test, more than max_brute_force = {max_brute_force}" )
+    if verbose :
+        print( f"Strategy: brute force for A in [{low}, {high}[" )
+    return solve_brute_force( program, B, C, low, high, nb_workers, verbose = verbose )
 
 def do_problem( str_data: str, verbose = False ) :
     setup, program = parse_data( str_data, verbose )
-    #setup[ "verbose" ] = True
-    #code, verbose_context = make_function( **setup )
-    setup[ "verbose" ] = False
-    code, silent_context = make_function( **setup )
-    print( "Function body :" )
-    print( code )
-    print()
-    solution = solve( program, silent_context[ "run" ] )
+    silent_run = partial( run_compiled, program, B = setup[ "B" ], C = setup[ "C" ] )
+    solutions = solve_auto( program, setup[ "B" ], setup[ "C" ], verbose = verbose )
+    solution = solutions[0] if len( solutions ) > 0 else None
     print()
+    print( f"{len( solutions )} solution(s) found: {solutions}" )
     if solution is not None :
         print( f"Verification for solution A = {solution}" )
-        #print()
-        #output = verbose_context[ "run" ]( A = solution )
-        output = silent_context[ "run" ]( A = solution )
+        output = silent_run( A = solution )
         print()
         print( "Solution found:")
         print( f"program:\t{program}")
@@ -523,9 +669,46 @@ def do_input() :
     str_data = get_file_content( get_input_file_path() )
     do_problem( str_data, True )
 
+def run_reference( program: str, A: int, B: int, C: int, max_steps: int ) -> list[int] :
+    # runs the interpreter, without messages, returns None if the program is still running after max_steps
+    computer = Computer( A, B, C, program )
+    for _ in range( max_steps ) :
+        if computer.is_halted :
+            return [ int(s) for s in computer.output.split( "," ) if s != "" ]
+        computer.execute( *computer.read() )
+    return None
+
+def test_compiler( nb_tests: int = 2000, seed: int = None ) :
+    # the compiled programs must give the same output as the interpreter (or the same error)
+    rng = random.Random( seed )
+    nb_compared = 0
+    for i in range( nb_tests ) :
+        program = ",".join( str( rng.randrange( 8 ) ) for _ in range( 2 * rng.randint( 1, 8 ) + rng.randint( 0, 1 ) ) )
+        A, B, C = rng.getrandbits( rng.randint( 0, 64 ) ), rng.getrandbits( 8 ), rng.getrandbits( 8 )
+        try :
+            expected = run_reference( program, A, B, C, 1000 )
+        except ValueError :
+            expected = ValueError
+        if expected is None :
+            # the program does not halt (or not quickly enough)
+            continue
+        try :
+            output = compile_program( program )( A, B, C )
+        except ValueError :
+            output = ValueError
+        nb_compared += 1
+        if output != expected :
+            print( f"ERROR: program {program} with A = {A}, B = {B}, C = {C}" )
+            print( f"    interpreter: {expected}" )
+            print( f"    compiled:    {output}" )
+            return False
+    print( f"Compiled programs match the interpreter for {nb_compared} programs" )
+    return True
+
 def main() :
     start = time.time()
     #test_computer()
+    test_compiler( seed = 0 )
     #do_tests(1)
     #do_tests(2)
     #do_tests(3)
@@ -536,4 +719,6 @@ def main() :
     elapsed = time.time() - start
     print( f"Total execution time: {elapsed:.3f} s" )
 
-main()
+# the guard is needed by the process pool, which may re-import this file in the workers
+if __name__ == "__main__" :
+    main()
@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 import os
+import sys
 import time
+import heapq
 from collections import namedtuple
 import re
 from typing import Callable
@@ -22,6 +24,8 @@ Coordinate = namedtuple( "Coordinate", [ "x", "y" ] )
 Node = namedtuple( "Node", [ "estimated_cost", "heuristic_to_end", "cost_from_start",
                             "from_state", "state" ] )
 Maze = namedtuple( "Maze", [ "width", "height", "tiles", "start", "end" ] )
+# state of the incremental (LPA*) search: g and rhs values per tile, and the priority queue
+LpaSearch = namedtuple( "LpaSearch", [ "maze", "g", "rhs", "queue" ] )
 
 COORDINATE_RE = re.compile( r"^(?P<x>\d+),(?P<y>\d+)$" )
 TILE_FREE = "."
@@ -140,16 +144,18 @@ def a_star( maze: Maze,
     open_set = add_open_node( open_set, starting_state, maze, heuristic, None, verbose )
     closed_set = dict()
     # loop: main algorithm
-    print( f"Searching for a path from @{starting_state} to @{maze.end}" )
+    if verbose :
+        print( f"Searching for a path from @{starting_state} to @{maze.end}" )
     while len( open_set ) > 0 :
         open_set, current_node = get_next_open_node( open_set )
         closed_set[ current_node.state ] = current_node
         for neighbour_state in get_neighbours( current_node.state, maze, verbose ) :
             if neighbour_state == maze.end :
                 # we reached the end and found _A_ shortest path
-                print( f"End reached @{neighbour_state}" )
                 end_node = make_node( neighbour_state, maze, current_node, heuristic, verbose )
-                print( f"Cost to reach the end: {end_node.cost_from_start}" )
+                if verbose :
+                    print( f"End reached @{neighbour_state}" )
+                    print( f"Cost to reach the end: {end_node.cost_from_start}" )
                 path = trace_path( end_node, closed_set, verbose )
                 return path, end_node.cost_from_start
             if neighbour_state not in closed_set :
@@ -157,7 +163,8 @@ def a_star( maze: Maze,
                 open_set = add_open_node(
                     open_set, neighbour_state, maze, heuristic, current_node, verbose
                 )
-    print( f"UNABLE TO FIND A PATH!!!" )
+    if verbose :
+        print( f"UNABLE TO FIND A PATH!!!" )
     return None, None
 
 def trace_path( end_node: Node, closed_set: dict[ Coordinate, Node ],
@@ -178,30 +185,190 @@ def fall( coordinates, maze, nb_turns, verbose = False ) :
     for coord in fallen :
         if verbose :
             print( f"Stone falling @{coord}" )
-        wrecked_maze.tiles.pop( coord )
+        # a stone may fall on a tile already blocked
+        wrecked_maze.tiles.pop( coord, None )
     return remaining, wrecked_maze
 
-def find_first_blocked( coordinates, maze, verbose = False ) :
-    # the path is free when one stone has fallen (we use 1 to avoid index errors)
-    # we assume the path is blocked when all the stones have fallen
-    last_free, first_blocked = 1, len( coordinates )
-    while first_blocked - last_free > 1 :
-        test_fall = last_free + ( first_blocked - last_free ) // 2
-        print( f"Testing stone #{test_fall}, falling @{coordinates[test_fall]}" )
-        remaining, wrecked_maze = fall( coordinates, maze, test_fall, verbose=False )
-        path, cost = a_star( wrecked_maze, heuristic_distance, None, verbose=False )
-        if path is None :
-            first_blocked = test_fall
+def find_root( parents: dict[ Coordinate, Coordinate ], coord: Coordinate ) -> Coordinate :
+    # union-find: root of the set of connected free tiles containing coord (with path halving)
+    while parents[ coord ] != coord :
+        parents[ coord ] = parents[ parents[ coord ] ]
+        coord = parents[ coord ]
+    return coord
+
+def union_tiles( parents: dict[ Coordinate, Coordinate ], sizes: dict[ Coordinate, int ],
+                a: Coordinate, b: Coordinate ) :
+    # union-find: merge the sets of a and b (union by size)
+    root_a, root_b = find_root( parents, a ), find_root( parents, b )
+    if root_a == root_b :
+        return
+    if sizes[ root_a ] < sizes[ root_b ] :
+        root_a, root_b = root_b, root_a
+    parents[ root_b ] = root_a
+    sizes[ root_a ] += sizes[ root_b ]
+
+def are_connected( parents: dict[ Coordinate, Coordinate ], a: Coordinate, b: Coordinate ) -> bool :
+    return a in parents and b in parents and find_root( parents, a ) == find_root( parents, b )
+
+def find_first_blocked_reverse( coordinates, maze, verbose = False ) :
+    # all the stones fall, then they are removed in reverse order:
+    # each removed stone frees a tile, which is merged with its free neighbours
+    # the first stone blocking the path is the last one removed before start and end get connected
+    first_fall = dict()
+    for i, coord in enumerate( coordinates ) :
+        first_fall.setdefault( coord, i )
+    parents = { coord: coord for coord in maze.tiles if coord not in first_fall }
+    sizes = { coord: 1 for coord in parents }
+    for coord in parents :
+        for neighbour in get_neighbours( coord, maze, verbose ) :
+            if neighbour in parents :
+                union_tiles( parents, sizes, coord, neighbour )
+    if are_connected( parents, maze.start, maze.end ) :
+        # the path is never blocked
+        return None, None
+    for i in range( len( coordinates ) - 1, -1, -1 ) :
+        coord = coordinates[ i ]
+        if first_fall.get( coord ) != i or coord not in maze.tiles :
+            # the tile stays blocked by an earlier stone (or is out of the maze)
+            continue
+        if verbose :
+            print( f"Removing stone #{i + 1} @{coord}" )
+        parents[ coord ], sizes[ coord ] = coord, 1
+        for neighbour in get_neighbours( coord, maze, verbose ) :
+            if neighbour in parents :
+                union_tiles( parents, sizes, coord, neighbour )
+        if are_connected( parents, maze.start, maze.end ) :
+            # the path is free with the first i stones: stone #i+1 is the first blocking one
+            print( f"First stone blocking the path is #{i + 1} @{coord}" )
+            return i + 1, coord
+    # the path is blocked before any stone falls
+    return 0, None
+
+def path_exists( first_blocked: int, nb_fallen: int ) -> bool :
+    # once the first blocking stone is known, the path stays blocked for every following stone
+    return first_blocked is None or nb_fallen < first_blocked
+
+def lpa_key( coord: Coordinate, search: LpaSearch ) -> tuple[ float, float ] :
+    cost = min( search.g.get( coord, float('inf') ), search.rhs.get( coord, float('inf') ) )
+    return ( cost + heuristic_distance( coord, search.maze ), cost )
+
+def lpa_update_tile( coord: Coordinate, search: LpaSearch, verbose: bool = False ) :
+    # rhs is the best cost from start through the neighbours, as known by the current g values
+    if coord != search.maze.start :
+        search.rhs[ coord ] = min(
+            [ search.g.get( neighbour, float('inf') ) + get_move_cost( neighbour, coord, verbose )
+             for neighbour in get_neighbours( coord, search.maze, verbose ) ],
+            default = float('inf')
+        )
+    if search.g.get( coord, float('inf') ) != search.rhs.get( coord, float('inf') ) :
+        # inconsistent tile: (re)scheduled, outdated entries are skipped when popped
+        heapq.heappush( search.queue, ( lpa_key( coord, search ), coord ) )
+
+def lpa_compute_path( search: LpaSearch, verbose: bool = False ) :
+    # process inconsistent tiles until the end of the maze is consistent
+    # and no queued tile could lead to a shorter path
+    maze = search.maze
+    while len( search.queue ) > 0 :
+        key, coord = search.queue[0]
+        if coord not in maze.tiles or search.g.get( coord, float('inf') ) == search.rhs.get( coord, float('inf') ) :
+            # blocked or already consistent tile
+            heapq.heappop( search.queue )
+            continue
+        if key != lpa_key( coord, search ) :
+            # outdated key
+            heapq.heapreplace( search.queue, ( lpa_key( coord, search ), coord ) )
+            continue
+        if key >= lpa_key( maze.end, search ) and search.g.get( maze.end, float('inf') ) == search.rhs.get( maze.end, float('inf') ) :
+            break
+        heapq.heappop( search.queue )
+        if search.g.get( coord, float('inf') ) > search.rhs[ coord ] :
+            # over-consistent: a shorter path was found
+            search.g[ coord ] = search.rhs[ coord ]
         else :
-            last_free = test_fall
-    print( f"Last stone leaving the path free is #{last_free} @{coordinates[last_free - 1]}" )
-    print( f"First stone blocking the path is #{first_blocked} @{coordinates[first_blocked - 1]}" )
-    return first_blocked, coordinates[first_blocked - 1]
+            # under-consistent: the path through this tile got longer
+            search.g[ coord ] = float('inf')
+            lpa_update_tile( coord, search, verbose )
+        for neighbour in get_neighbours( coord, maze, verbose ) :
+            lpa_update_tile( neighbour, search, verbose )
+
+def lpa_trace_path( search: LpaSearch, verbose: bool = False ) -> list[ Coordinate ] :
+    # walk back from the end, always to the neighbour closest to the start
+    maze = search.maze
+    if search.g.get( maze.end, float('inf') ) == float('inf') :
+        return None
+    path = [ maze.end ]
+    while path[-1] != maze.start :
+        path.append( min( get_neighbours( path[-1], maze, verbose ),
+                         key = lambda neighbour: search.g.get( neighbour, float('inf') ) ) )
+    path.reverse() # reverse to get the path from start to end
+    return path
+
+def lpa_block_tile( coord: Coordinate, search: LpaSearch, verbose: bool = False ) :
+    search.maze.tiles.pop( coord )
+    search.g.pop( coord, None )
+    search.rhs.pop( coord, None )
+    for neighbour in get_neighbours( coord, search.maze, verbose ) :
+        lpa_update_tile( neighbour, search, verbose )
+
+def incremental_paths( coordinates, maze, verbose = False ) :
+    # the stones fall one by one, and the shortest path is repaired after each fall
+    # yields (nb of fallen stones, cost of the shortest path or None if the path is blocked)
+    search = LpaSearch( Maze( maze.width, maze.height, maze.tiles.copy(), maze.start, maze.end ),
+                       dict(), { maze.start: 0 }, [] )
+    lpa_update_tile( maze.start, search, verbose )
+    lpa_compute_path( search, verbose )
+    path = lpa_trace_path( search, verbose )
+    on_path = set() if path is None else set( path )
+    for i, coord in enumerate( coordinates, start = 1 ) :
+        if path is not None and coord in search.maze.tiles :
+            lpa_block_tile( coord, search, verbose )
+            if coord in on_path :
+                # only a stone falling on the current path can make it longer
+                # (other changes are queued and repaired later, when needed)
+                if coord in ( maze.start, maze.end ) :
+                    path = None
+                else :
+                    lpa_compute_path( search, verbose )
+                    path = lpa_trace_path( search, verbose )
+                on_path = set() if path is None else set( path )
+        yield i, None if path is None else len( path ) - 1
+
+def check_incremental_paths( coordinates, maze, first_blocked: int, nb_checks: int = 300,
+                            verbose: bool = False ) -> bool :
+    # the repaired paths must have the cost found by a full search on the same maze,
+    # for the first nb_checks stones, and must exist as long as the path is not blocked
+    checked_maze = Maze( maze.width, maze.height, maze.tiles.copy(), maze.start, maze.end )
+    for nb_fallen, cost in incremental_paths( coordinates, maze, verbose ) :
+        checked_maze.tiles.pop( coordinates[ nb_fallen - 1 ], None )
+        if verbose or cost is None :
+            print( f"Stone #{nb_fallen} @{coordinates[nb_fallen - 1]}: cost of path: {cost}" )
+        if nb_fallen <= nb_checks :
+            _, expected = a_star( checked_maze )
+            if cost != expected :
+                print( f"ERROR: stone #{nb_fallen} @{coordinates[nb_fallen - 1]}: incremental cost {cost}, expected {expected}" )
+                return False
+        elif ( cost is not None ) != path_exists( first_blocked, nb_fallen ) :
+            print( f"ERROR: stone #{nb_fallen} @{coordinates[nb_fallen - 1]}: incremental cost {cost}, path expected: {cost is None}" )
+            return False
+        if cost is None :
+            break
+    print( f"Incremental paths match the full search for {min( nb_fallen, nb_checks )} stones" )
+    return True
 
-def do_problem( str_data: str, maze_max: int, verbose = False ) :
+def do_problem( str_data: str, maze_max: int, simulate: bool = False, verbose = False ) :
     coordinates, maze = parse_data( str_data, maze_max, verbose )
     print_maze( maze )
-    first_blocked, blocked_coord = find_first_blocked( coordinates, maze, verbose )
+    first_blocked, blocked_coord = find_first_blocked_reverse( coordinates, maze, verbose )
+    if simulate :
+        check_incremental_paths( coordinates, maze, first_blocked, verbose = verbose )
+    if first_blocked is None :
+        print( f"The path is never blocked" )
+        print( f"END" )
+        return
+    if blocked_coord is None :
+        print( f"The path is blocked before any stone falls" )
+        print( f"END" )
+        return
     remaining, blocked_maze = fall( coordinates, maze, first_blocked, verbose )
     print_maze( blocked_maze, highlights = [ blocked_coord ] )
     print( f"First stone blocking the path is #{first_blocked} @{blocked_coord}" )
@@ -210,11 +377,11 @@ def do_problem( str_data: str, maze_max: int, verbose = False ) :
 
 def do_tests( i = None ) :
     str_data = get_file_content( get_test_file_path( i ) )
-    do_problem( str_data, 6, True )
+    do_problem( str_data, 6, verbose = True )
 
-def do_input() :
+def do_input( simulate: bool = False ) :
     str_data = get_file_content( get_input_file_path() )
-    do_problem( str_data, 70, False )
+    do_problem( str_data, 70, simulate, verbose = False )
 
 def main() :
     os.system('color')
@@ -225,7 +392,8 @@ def main() :
     #do_tests(4)
     #do_tests(5)
     #do_tests()
-    do_input()
+    # with --simulate, the incremental path repair is run and checked against full searches
+    do_input( "--simulate" in sys.argv )
     elapsed = time.time() - start
     print( f"Total execution time: {elapsed:.3f} s" )
 
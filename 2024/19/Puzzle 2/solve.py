@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
 import time
-from functools import cache
+from functools import lru_cache
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
 
 def get_test_file_path( i = None ) :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -15,6 +17,8 @@ def get_file_content( file_path ) :
         data = f.read()
     return data
 
+TRIE_END = None # key marking the end of a pattern in a trie node
+
 def parse_data( str_data: str, verbose: bool = False ) :
     lines = str_data.split( "\n" )
     towel_patterns = tuple( lines[0].split( ", " ) )
@@ -27,43 +31,58 @@ def parse_data( str_data: str, verbose: bool = False ) :
     print()
     return towel_patterns, designs
 
-@cache
-def design_possible( design: str, towel_patterns: tuple[str], verbose: bool = False ) -> bool :
-    if verbose :
-        print( f"Solving for design: {design}" )
-    if design == "" :
-        # end of recursive loop!
-        return True
+@lru_cache( maxsize = 16 )
+def build_trie( towel_patterns: tuple[str] ) -> dict :
+    # the trie is built once per set of patterns (and only a few sets are kept)
+    trie = dict()
     for pattern in towel_patterns :
-        if design[:len(pattern)] == pattern :
-            # the start of the design match the pattern
-            # recursive call to see if the rest of the design is possible
-            if design_possible( design[len(pattern):], towel_patterns, verbose ) :
-                # if yes, we return True immediatly to stop the search
-                return True
-            # otherwise, we check with the next pattern
-        # otherwise, we check with the next pattern
-    return False
+        node = trie
+        for char in pattern :
+            node = node.setdefault( char, dict() )
+        node[ TRIE_END ] = True
+    return trie
 
-@cache
-def nb_arrangements( design: str, towel_patterns: tuple[str], verbose: bool = False ) -> int :
+def count_arrangements( design: str, towel_patterns: tuple[str], verbose: bool = False ) -> int :
+    # counts[i] is the nb of arrangements for the end of the design, starting at position i
+    # it is computed from the end of the design, walking the trie from position i
+    # to find every pattern matching the design at this position
+    trie = build_trie( towel_patterns )
+    counts = [ 0 ] * ( len( design ) + 1 )
+    counts[ len( design ) ] = 1
+    for start in range( len( design ) - 1, -1, -1 ) :
+        node = trie
+        for end in range( start, len( design ) ) :
+            node = node.get( design[ end ] )
+            if node is None :
+                # no pattern starts with design[start:end+1]
+                break
+            if TRIE_END in node :
+                # design[start:end+1] is a pattern
+                counts[ start ] += counts[ end + 1 ]
     if verbose :
-        print( f"Solving for design: {design}" )
-    if design == "" :
-        # end of recursive loop!
-        return 1
-    count = 0 # nb of possible arrangements for the design
-    for pattern in towel_patterns :
-        if design[:len(pattern)] == pattern :
-            # the start of the design match the pattern
-            # recursive call to get the nb of arrangements for the rest of the design
-            count += nb_arrangements( design[len(pattern):], towel_patterns, verbose )
-        # otherwise, we check with the next pattern
-    return count
+        print( f"Design {design}: {counts[0]} arrangement(s)" )
+    return counts[ 0 ]
+
+def count_arrangements_chunk( designs: list[str], towel_patterns: tuple[str],
+                             verbose: bool = False ) -> list[int] :
+    return [ count_arrangements( design, towel_patterns, verbose ) for design in designs ]
+
+def count_all_arrangements( designs: list[str], towel_patterns: tuple[str], nb_workers: int = 1,
+                           chunk_size: int = 50, verbose: bool = False ) -> list[int] :
+    # the designs are processed by chunks, in parallel if more than one worker is used
+    # (nb_workers = None for as many workers as processors)
+    chunks = [ designs[i:i + chunk_size] for i in range( 0, len( designs ), chunk_size ) ]
+    if nb_workers == 1 or len( chunks ) <= 1 :
+        results = [ count_arrangements_chunk( chunk, towel_patterns, verbose ) for chunk in chunks ]
+    else :
+        with ProcessPoolExecutor( nb_workers ) as executor :
+            results = list( executor.map( count_arrangements_chunk, chunks,
+                                         repeat( towel_patterns ), repeat( verbose ) ) )
+    return [ count for chunk in results for count in chunk ]
 
-def do_problem( str_data: str, verbose = False ) :
+def do_problem( str_data: str, nb_workers: int = 1, verbose = False ) :
     towel_patterns, designs = parse_data( str_data, verbose )
-    possible = [ nb_arrangements( d, towel_patterns, verbose ) for d in designs ]
+    possible = count_all_arrangements( designs, towel_patterns, nb_workers, verbose = verbose )
     if verbose :
         print( f"Arrangemens found: {', '.join( [ str(c) for c in possible ] )}" )
     print( f"Nb of arrangemens found: {sum(possible)}" )
@@ -71,11 +90,11 @@ def do_problem( str_data: str, verbose = False ) :
 
 def do_tests( i = None ) :
     str_data = get_file_content( get_test_file_path( i ) )
-    do_problem( str_data, True )
+    do_problem( str_data, verbose = True )
 
 def do_input() :
     str_data = get_file_content( get_input_file_path() )
-    do_problem( str_data, False )
+    do_problem( str_data, verbose = False )
 
 def main() :
     start = time.time()
@@ -89,4 +108,6 @@ def main() :
     elapsed = time.time() - start
     print( f"Total execution time: {elapsed:.3f} s" )
 
-main()
+# the guard is needed by the process pool, which may re-import this file in the workers
+if __name__ == "__main__" :
+    main()
@@ -2,7 +2,8 @@
 
 import time
 from collections import namedtuple
-from collections import defaultdict
+from functools import cache
+import numpy as np
 
 def get_test_file_path( i = None ) :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -17,6 +18,13 @@ def get_file_content( file_path ) :
 
 Coordinate = namedtuple( "Coordinate", [ "x", "y" ] )
 Maze = namedtuple( "Maze", [ "width", "height", "tiles", "start", "end" ] )
+Vector = namedtuple( "Vector", [ "dx", "dy" ] )
+# a corridor of the track between two junctions, with its tiles (both junctions included)
+Edge = namedtuple( "Edge", [ "start", "end", "tiles" ] )
+# the track as a junction graph
+Graph = namedtuple( "Graph", [ "maze", "junctions", "edges" ] )
+
+DIR_VECTORS = ( Vector(+1,0), Vector(0,-1), Vector(-1,0), Vector(0,+1) )
 
 START_TILE = "S"
 END_TILE = "E"
@@ -61,67 +69,122 @@ def print_maze( maze: Maze, shortcut = None, verbose: bool = False ) :
         print( f"Shortcut: {shortcut}" )
     print()
 
+def get_open_directions( coord: Coordinate, maze: Maze ) -> list[ int ] :
+    # the directions (as indexes in DIR_VECTORS) leading to a non-wall tile
+    return [
+        dir for dir, vector in enumerate( DIR_VECTORS )
+        if Coordinate( coord.x + vector.dx, coord.y + vector.dy ) in maze.tiles
+    ]
+
+def follow_corridor( junction: Coordinate, dir: int, junctions: set[ Coordinate ], maze: Maze,
+                    verbose: bool = False ) -> Edge :
+    # the track tiles between two junctions have 2 open directions: we leave by the one we did not enter by
+    coord = junction
+    tiles = [ coord ]
+    while True :
+        vector = DIR_VECTORS[ dir ]
+        coord = Coordinate( coord.x + vector.dx, coord.y + vector.dy )
+        tiles.append( coord )
+        if coord in junctions :
+            break
+        back_dir = ( dir + 2 ) % len( DIR_VECTORS )
+        dir = [ d for d in get_open_directions( coord, maze ) if d != back_dir ][0]
+    return Edge( junction, coord, tuple( tiles ) )
+
+def compress_maze( maze: Maze, verbose: bool = False ) -> Graph :
+    # junctions are the tiles that are not in the middle of a corridor
+    # (dead ends, crossings...) plus the start and the end of the track
+    junctions = { maze.start, maze.end }
+    for coord in maze.tiles :
+        if len( get_open_directions( coord, maze ) ) != 2 :
+            junctions.add( coord )
+    edges: dict[ Coordinate, list[ Edge ] ] = dict()
+    for junction in junctions :
+        edges[ junction ] = [
+            follow_corridor( junction, dir, junctions, maze, verbose )
+            for dir in get_open_directions( junction, maze )
+        ]
+    nb_edges = sum( len( junction_edges ) for junction_edges in edges.values() )
+    print( f"Maze compressed: {len(maze.tiles)} tiles -> {len(junctions)} junctions, {nb_edges} edges" )
+    return Graph( maze, junctions, edges )
+
 def get_path( maze: Maze, verbose: bool = False ) :
+    # the track is followed junction by junction on the compressed maze
+    # then expanded back to the tiles
     print( f"Computing path..." )
+    graph = compress_maze( maze, verbose )
     path: list[Coordinate] = [ maze.start, ]
+    visited = { maze.start }
     while path[-1] != maze.end :
-        neighbours = (
-            Coordinate( path[-1].x - 1, path[-1].y ),
-            Coordinate( path[-1].x + 1, path[-1].y ),
-            Coordinate( path[-1].x, path[-1].y - 1 ),
-            Coordinate( path[-1].x, path[-1].y + 1 ),
-        )
-        next = [ n for n in neighbours if n in maze.tiles and n not in path ]
+        next = [ edge for edge in graph.edges[ path[-1] ] if edge.end not in visited ]
         if len(next) == 0 :
-            raise RuntimeError( f"No next tile found for tile @{path[-1]}" )
+            raise RuntimeError( f"No next junction found for tile @{path[-1]}" )
         if len(next) > 1 :
-            raise RuntimeError( f"More than 1 next tile found for tile @{path[ -1 ]}: {next}" )
-        path.append( next[0] )
+            raise RuntimeError( f"More than 1 next junction found for tile @{path[ -1 ]}: {[ edge.end for edge in next ]}" )
+        path.extend( next[0].tiles[1:] )
+        visited.add( next[0].end )
     if verbose :
         print( f"Path found: {path}" )
     print( f"Path length: {len(path)}" )
     return path
 
-def get_flying_distance( a: Coordinate, b: Coordinate ) :
-    return abs( a.x - b.x ) + abs( a.y - b.y )
-
-def get_neighbours( center: Coordinate, radius: int, possible: list[Coordinate] ) :
-    neighbours = set()
-    for dx in [ 0, radius ] :
-        dy = radius - dx
-        neighbours.add( Coordinate( center.x + dx, center.y + dy ) )
-        neighbours.add( Coordinate( center.x - dx, center.y + dy ) )
-        neighbours.add( Coordinate( center.x + dx, center.y - dy ) )
-        neighbours.add( Coordinate( center.x - dx, center.y - dy ) )
-    return [ n for n in neighbours if n in possible ]
-
-def find_shortcuts( path: list[Coordinate], sc_cost: int, sc_min_gain: int, verbose: bool = False ) :
-    shortcuts = []
+def get_distances( maze: Maze, path: list[Coordinate] ) -> np.ndarray :
+    # distance from the start for each tile of the track, -1 for walls
+    distances = np.full( ( maze.height, maze.width ), -1, dtype = np.int64 )
+    xs = np.fromiter( ( coord.x for coord in path ), dtype = np.int64, count = len( path ) )
+    ys = np.fromiter( ( coord.y for coord in path ), dtype = np.int64, count = len( path ) )
+    distances[ ys, xs ] = np.arange( len( path ) )
+    return distances
+
+@cache
+def get_shortcut_offsets( max_cost: int, min_cost: int = 2 ) -> tuple[ tuple[ int, int, int ] ] :
+    # the diamond of (dx, dy, cost) of every shortcut, computed once
+    return tuple(
+        ( dx, dy, abs( dx ) + abs( dy ) )
+        for dx in range( -max_cost, max_cost + 1 )
+        for dy in range( -max_cost, max_cost + 1 )
+        if min_cost <= abs( dx ) + abs( dy ) <= max_cost
+    )
+
+def get_shifted_views( distances: np.ndarray, dx: int, dy: int ) -> tuple[ np.ndarray, np.ndarray ] :
+    # views of the distances at (x, y) and at (x + dx, y + dy), for every (x, y) where both are in the maze
+    height, width = distances.shape
+    starts = distances[ max( 0, -dy ):height - max( 0, dy ), max( 0, -dx ):width - max( 0, dx ) ]
+    ends = distances[ max( 0, dy ):height - max( 0, -dy ), max( 0, dx ):width - max( 0, -dx ) ]
+    return starts, ends
+
+def get_gain_histogram( distances: np.ndarray, sc_max_cost: int, sc_min_gain: int,
+                       sc_min_cost: int = 2 ) -> np.ndarray :
+    # histogram[gain] is the nb of shortcuts saving exactly gain picoseconds (for gain >= sc_min_gain)
+    # each offset of the diamond is checked for the whole maze at once
+    sc_min_gain = max( sc_min_gain, 1 ) # a shortcut must save some time
+    histogram = np.zeros( distances.max() + 1, dtype = np.int64 )
+    height, width = distances.shape
+    for dx, dy, cost in get_shortcut_offsets( sc_max_cost, sc_min_cost ) :
+        if abs( dx ) >= width or abs( dy ) >= height :
+            # the shortcut would leave the maze
+            continue
+        starts, ends = get_shifted_views( distances, dx, dy )
+        gains = ends - starts - cost
+        gains = gains[ ( starts >= 0 ) & ( ends >= 0 ) & ( gains >= sc_min_gain ) ]
+        histogram += np.bincount( gains, minlength = len( histogram ) )
+    return histogram
+
+def count_shortcuts( maze: Maze, path: list[Coordinate], sc_max_cost: int, sc_min_gain: int,
+                    verbose: bool = False ) -> int :
     print( f"Searching for shortcuts saving at least {sc_min_gain} picoseconds..." )
-    for sc_start_index, sc_start in enumerate( path ) :
-        min_sc_end_index = sc_start_index + sc_cost + sc_min_gain
-        candidates = get_neighbours( sc_start, sc_cost, path[min_sc_end_index:] )
-        for sc_end in candidates :
-            sc_end_index = path.index( sc_end )
-            sc_gain = ( sc_end_index - sc_start_index ) - sc_cost
-            if verbose :
-                print( f"Shortcut found, saving {sc_gain} picoseconds: from @{sc_start} to @{sc_end}" )
-            shortcuts.append( (sc_gain, sc_start, sc_end ) )
+    histogram = get_gain_histogram( get_distances( maze, path ), sc_max_cost, sc_min_gain )
     if verbose :
-        shortcuts.sort()
-        sc_by_gain = defaultdict( list )
-        for gain, *values in shortcuts:
-            sc_by_gain[gain].append(values)
-        for gain in sc_by_gain :
-            print( f"- {len(sc_by_gain[gain])} shortcuts found saving {gain} picoseconds" )
-    return shortcuts
+        for gain in np.flatnonzero( histogram ) :
+            print( f"- {histogram[gain]} shortcuts found saving {gain} picoseconds" )
+    return int( histogram.sum() )
 
 def do_problem( str_data: str, sc_cost: int, sc_min_gain: int, verbose: bool = False ) :
     maze = parse_data( str_data, verbose )
     print_maze( maze, None, verbose )
     path = get_path( maze, verbose )
-    shortcuts = find_shortcuts( path, sc_cost, sc_min_gain, verbose )
-    print( f"{len(shortcuts)} shortcuts found saving at least {sc_min_gain} picoseconds" )
+    nb_shortcuts = count_shortcuts( maze, path, sc_cost, sc_min_gain, verbose )
+    print( f"{nb_shortcuts} shortcuts found saving at least {sc_min_gain} picoseconds" )
     print( f"END" )
 
 def do_tests( i: int = None ) :
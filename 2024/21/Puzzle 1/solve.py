@@ -2,7 +2,6 @@
 
 import time
 from collections import namedtuple
-from itertools import permutations
 from functools import cache
 
 def get_test_file_path( i: int = None ) -> str :
@@ -71,62 +70,54 @@ def parse_data( str_data: str, verbose: bool = False ) :
     print( f"Codes to enter: {codes}" )
     return codes
 
-def is_valid_moves( start: Coordinate, moves: tuple[str], pad_map: dict[ Coordinate, str ] ) :
-    position = start
-    for move in moves :
-        vector = MOVE_VECTORS[ move ]
-        position = Coordinate( position.x + vector.dx, position.y + vector.dy )
-        if position not in pad_map :
-            # we are outside the pad: moves are not valid
-            return False
-    # we completed the moves without leaving the pad: moves are valid
-    return True
-
-@cache
-def get_moves( from_key: str, to_key: str, is_numpad: bool ) :
+def get_candidate_moves( from_key: str, to_key: str, is_numpad: bool ) -> list[ str ] :
+    # the best sequences are either all horizontal moves then all vertical moves, or the opposite
+    # (mixing them only adds key presses on the upper pads)
+    # and the ones going through the gap of the pad are excluded
     pad, pad_map = ( NUMPAD, NUMPAD_MAP ) if is_numpad else ( DIRPAD, DIRPAD_MAP )
-    if from_key == to_key :
-        # shortcut to reduce complexity: no move necessary
-        return [ "A" ]
-    start = pad[ from_key ]
-    end = pad[ to_key ]
-    move_vector = Vector( end.x - start.x, end.y - start.y )
-    move_x = ">" if move_vector.dx >= 0 else "<"
-    move_y = "v" if move_vector.dy >= 0 else "^"
-    moves = move_x * abs( move_vector.dx ) + move_y * abs( move_vector.dy )
-    valid_moves = []
-    for candidate in permutations( moves ) :
-        if is_valid_moves( start, candidate, pad_map ) :
-            valid_moves.append( "".join( candidate ) + "A" )
-    return valid_moves
+    start, end = pad[ from_key ], pad[ to_key ]
+    move_x = ( ">" if end.x >= start.x else "<" ) * abs( end.x - start.x )
+    move_y = ( "v" if end.y >= start.y else "^" ) * abs( end.y - start.y )
+    candidates = []
+    if Coordinate( end.x, start.y ) in pad_map :
+        candidates.append( move_x + move_y + "A" )
+    if Coordinate( start.x, end.y ) in pad_map and move_y + move_x + "A" not in candidates :
+        candidates.append( move_y + move_x + "A" )
+    return candidates
+
+def get_sequence_cost( sequence: str, costs: dict[ tuple[ str, str ], int ] ) -> int :
+    # every pad starts on "A", and the cost of each key is given by the table of the pad above
+    return sum( costs[ ( from_key, to_key ) ] for from_key, to_key in zip( "A" + sequence, sequence ) )
+
+def get_pad_costs( costs: dict[ tuple[ str, str ], int ], is_numpad: bool ) -> dict[ tuple[ str, str ], int ] :
+    # cost of pressing to_key after from_key on a pad controlled by a directional pad
+    # whose own costs are given by the table costs
+    pad = NUMPAD if is_numpad else DIRPAD
+    return {
+        ( from_key, to_key ) : min(
+            get_sequence_cost( moves, costs ) for moves in get_candidate_moves( from_key, to_key, is_numpad )
+        )
+        for from_key in pad for to_key in pad
+    }
 
 @cache
-def get_shortest_length( code: str, max_depth: int, cur_depth: int = 0 ) :
-    current_key = "A" # starting key for all numeric & directional pads
-    is_numpad = cur_depth == 0
-    sequence_length = 0
-    for next_key in list( code ) :
-        if cur_depth == max_depth :
-            # end of recursive loop
-            # all sequences have the same length: we take the 1st one
-            sequence_length += len( get_moves( current_key, next_key, is_numpad )[0] )
-        else :
-            # compute the moves on the "next" keypad to go from current to next key
-            moves = get_moves( current_key, next_key, is_numpad )
-            # compute the shortest length for each possible move
-            sequences_length = [ get_shortest_length( move, max_depth, cur_depth + 1 )
-                                for move in moves ]
-            # get the minimum shortest length
-            sequence_length += min( sequences_length )
-        current_key = next_key
-    return sequence_length
+def get_numpad_costs( nb_directional_pads: int ) -> dict[ tuple[ str, str ], int ] :
+    # built bottom-up: a human presses every key of the last directional pad at a cost of 1
+    # then each robot adds a 5x5 table computed from the one of the pad it is controlled from
+    costs = { ( from_key, to_key ) : 1 for from_key in DIRPAD for to_key in DIRPAD }
+    for _ in range( nb_directional_pads ) :
+        costs = get_pad_costs( costs, False )
+    return get_pad_costs( costs, True )
+
+def get_code_length( code: str, nb_directional_pads: int ) -> int :
+    return get_sequence_cost( code, get_numpad_costs( nb_directional_pads ) )
 
 def do_problem( str_data: str, nb_directional_pads: int = 2, verbose: bool = False ) :
     codes = parse_data( str_data, verbose )
     complexity = 0
     for code in codes :
         value = int( code[0:-1] )
-        length = get_shortest_length( code, nb_directional_pads )
+        length = get_code_length( code, nb_directional_pads )
         print( f"- {code}: sequence length = {length}" )
         complexity += value * length
     print( f"Complexity: {complexity}" )
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import re
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -47,10 +48,23 @@ def next_secret_number( secret_number ) :
     secret_number = prune( mix( mul_2048( secret_number ), secret_number ) )
     return secret_number
 
-def iter_secret_number( secret_number, nb_iter = 2000 ) :
+def iter_secret_numbers( secret_numbers: np.ndarray, nb_iter = 2000 ) -> np.ndarray :
+    # the same steps as next_secret_number, for a whole array of monkeys at once
+    # (mix, prune and the shifts work on numpy arrays as well as on ints)
+    secret_numbers = secret_numbers.astype( np.uint32 )
     for i in range( nb_iter ) :
-        secret_number = next_secret_number( secret_number )
-    return secret_number
+        secret_numbers = next_secret_number( secret_numbers )
+    return secret_numbers
+
+def iter_chunks( secret_numbers: np.ndarray, chunk_size = 100000 ) :
+    # the monkeys are processed by chunks to cap the memory used
+    for start in range( 0, len( secret_numbers ), chunk_size ) :
+        yield secret_numbers[ start:start + chunk_size ]
+
+def get_secret_numbers_sum( str_datas, nb_iter = 2000, chunk_size = 100000 ) -> int :
+    secret_numbers = np.array( [ int( x.strip() ) for x in str_datas ], dtype = np.uint32 )
+    return sum( int( iter_secret_numbers( chunk, nb_iter ).sum( dtype = np.uint64 ) )
+               for chunk in iter_chunks( secret_numbers, chunk_size ) )
 
 def do_check( secret_number, nb_iter ) :
     print( f"Start: {secret_number}" )
@@ -61,15 +75,11 @@ def do_check( secret_number, nb_iter ) :
 
 def do_tests() :
     datas = get_file_content( get_test_file_path(), True )
-    tests = [ int( x.strip() ) for x in datas ]
-    results = [ iter_secret_number( x ) for x in tests ]
-    print( sum( results ) )
+    print( get_secret_numbers_sum( datas ) )
 
 def do_input() :
     datas = get_file_content( get_input_file_path(), True )
-    tests = [ int( x.strip() ) for x in datas ]
-    results = [ iter_secret_number( x ) for x in tests ]
-    print( sum( results ) )
+    print( get_secret_numbers_sum( datas ) )
 
 def main() :
     #do_check( 123, 10 )
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import time
+import numpy as np
 
 def get_test_file_path() :
     return "tests.txt"
@@ -16,6 +17,11 @@ def get_file_content( _file_path, _as_lines = False ) :
             data = f.read()
     return data
 
+# a change of price is between -9 and +9: 19 possible values, encoded as change + 9
+NB_CHANGES = 19
+# a sequence of 4 changes is encoded as an integer in base 19
+NB_SEQUENCES = NB_CHANGES ** 4
+
 def mix( a, b ) :
     return a ^ b
 
@@ -52,24 +58,47 @@ def iter_secret_number( secret_number, nb_iter = 2000 ) :
         secret_number = next_secret_number( secret_number )
     return secret_number
 
-def prices_sequences( secret_number, nb_iter = 2000 ) :
-    price = secret_number % 10
-    diff = None
-    seq = []
-    all_seq = {}
-    for i in range( nb_iter ) :
-        secret_number = next_secret_number( secret_number )
-        prev = price
-        price = secret_number % 10
-        diff = price - prev
-        seq.append( diff )
-        if len( seq ) > 4 :
-            seq.pop( 0 )
-        if len( seq ) == 4 :
-            key = ",".join( [ str(n) for n in seq ] )
-            if ( key not in all_seq ) :
-                all_seq[ key ] = price
-    return all_seq
+def iter_chunks( secret_numbers: np.ndarray, chunk_size = 100000 ) :
+    # the monkeys are processed by chunks to cap the memory used
+    for start in range( 0, len( secret_numbers ), chunk_size ) :
+        yield secret_numbers[ start:start + chunk_size ]
+
+def get_prices( secret_numbers: np.ndarray, nb_iter = 2000 ) -> np.ndarray :
+    # price matrix: one row per monkey, nb_iter + 1 prices (the starting one included)
+    secret_numbers = secret_numbers.astype( np.uint32 )
+    prices = np.empty( ( len( secret_numbers ), nb_iter + 1 ), dtype = np.int8 )
+    prices[ :, 0 ] = secret_numbers % 10
+    for i in range( 1, nb_iter + 1 ) :
+        secret_numbers = next_secret_number( secret_numbers )
+        prices[ :, i ] = secret_numbers % 10
+    return prices
+
+def get_sequence_keys( prices: np.ndarray ) -> np.ndarray :
+    # integer key of the sequence of the 4 last changes, for each price from the 5th one
+    changes = np.diff( prices.astype( np.int32 ), axis = 1 ) + NB_CHANGES // 2
+    return ( ( changes[ :, :-3 ] * NB_CHANGES + changes[ :, 1:-2 ] ) * NB_CHANGES
+            + changes[ :, 2:-1 ] ) * NB_CHANGES + changes[ :, 3: ]
+
+def decode_sequence_key( key: int ) -> str :
+    changes = []
+    for i in range( 4 ) :
+        key, change = divmod( key, NB_CHANGES )
+        changes.append( change - NB_CHANGES // 2 )
+    return ",".join( [ str(n) for n in reversed( changes ) ] )
+
+def add_bananas( prices: np.ndarray, bananas: np.ndarray, nb_monkeys: np.ndarray ) :
+    # for each monkey, only the first occurrence of a sequence counts (the monkey sells at once)
+    # the position of the first occurrence of each sequence is stamped in first_seen
+    keys = get_sequence_keys( prices )
+    sale_prices = prices[ :, 4: ]
+    positions = np.arange( keys.shape[1], dtype = np.int32 )
+    first_seen = np.empty( NB_SEQUENCES, dtype = np.int32 )
+    for monkey_keys, monkey_prices in zip( keys, sale_prices ) :
+        first_seen[ monkey_keys ] = len( positions ) # only the slots of this monkey are reset
+        np.minimum.at( first_seen, monkey_keys, positions )
+        first = first_seen[ monkey_keys ] == positions
+        bananas[ monkey_keys[ first ] ] += monkey_prices[ first ]
+        nb_monkeys[ monkey_keys[ first ] ] += 1
 
 def do_check( secret_number, nb_iter ) :
     price = secret_number % 10;
@@ -82,31 +111,19 @@ def do_check( secret_number, nb_iter ) :
         diff = price - prev
     print( f"{nb_iter}: {secret_number} => price is {price} ({diff})" )
 
-def do_problem( str_datas ) :
-    datas = [ int( s.strip() ) for s in str_datas ]
+def do_problem( str_datas, chunk_size = 10000 ) :
+    datas = np.array( [ int( s.strip() ) for s in str_datas ], dtype = np.uint32 )
     print( f"Computing price sequences for {len( datas )} monkeys...")
-    all_sequences = {}
-    for i, secret_number in enumerate( datas ) :
-        print( f"Computing for monkey #{i+1}, starting secret number: {secret_number}" )
-        monkey_sequences = prices_sequences( secret_number )
-        for key, price in monkey_sequences.items() :
-            if ( key in all_sequences ) :
-                all_sequences[ key ][0] += price # price in bananas
-                all_sequences[ key ][1] += 1     # nb monkeys with this sequence
-            else :
-                all_sequences[ key ] = [ price, 1 ]
-    print( f"Total number of sequences found: {len( all_sequences )}" )
-    max_sequence = ""
-    max_price = 0
-    max_nb_monkeys = 0
-    for seq, price, nb_monkeys in [ (k, v[0], v[1]) for k, v in all_sequences.items() ] :
-        if price > max_price :
-            max_sequence = seq
-            max_price = price
-            max_nb_monkeys = nb_monkeys
-    print( f"Maximum number of bananas: {max_price}" )
-    print( f"    for sequence <{max_sequence}>" )
-    print( f"    found in {max_nb_monkeys} monkeys" )
+    bananas = np.zeros( NB_SEQUENCES, dtype = np.int64 )    # price in bananas, per sequence
+    nb_monkeys = np.zeros( NB_SEQUENCES, dtype = np.int64 ) # nb monkeys with this sequence
+    for i, chunk in enumerate( iter_chunks( datas, chunk_size ) ) :
+        print( f"Computing for monkeys #{i * chunk_size + 1} to #{i * chunk_size + len( chunk )}" )
+        add_bananas( get_prices( chunk ), bananas, nb_monkeys )
+    print( f"Total number of sequences found: {np.count_nonzero( nb_monkeys )}" )
+    max_key = int( np.argmax( bananas ) )
+    print( f"Maximum number of bananas: {bananas[ max_key ]}" )
+    print( f"    for sequence <{decode_sequence_key( max_key )}>" )
+    print( f"    found in {nb_monkeys[ max_key ]} monkeys" )
 
 def do_tests() :
     do_problem( get_file_content( get_test_file_path(), True ) )
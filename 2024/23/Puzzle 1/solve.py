@@ -30,29 +30,56 @@ def parse_data( str_data: str, verbose: bool = False ) :
             print( f"Connected to {comp}: {network[ comp ]}" )
     return network
 
-def find_sets( network: dict[ str, set[str] ], filter: str = None, verbose: bool = False ) :
-    comp_sets = set()
-    for comp1 in network :
-        for comp2 in network[ comp1 ] :
-            comp3_set = network[ comp1 ].intersection( network[ comp2 ] )
-            for comp3 in comp3_set :
-                if filter is None or comp1[0] == filter or comp2[0] == filter or comp3[0] == filter :
-                    comp_sets.add( tuple( sorted( [ comp1, comp2, comp3 ] ) ) )
-    if verbose :
-        for comp_set in comp_sets :
-            print( f"Computer set: {comp_set}" )
-    return comp_sets
+def get_ranked_network( network: dict[ str, set[str] ] ) -> tuple[ list[str], list[ set[int] ], list[ set[int] ] ] :
+    # computers are given integer ids ranked by (degree, name)
+    # higher[i] only keeps the neighbours of computer #i ranked after it
+    names = sorted( network.keys(), key = lambda name: ( len( network[ name ] ), name ) )
+    ids = { name: i for i, name in enumerate( names ) }
+    adjacency = [ { ids[ neighbour ] for neighbour in network[ name ] } for name in names ]
+    higher = [ { neighbour for neighbour in neighbours if neighbour > i }
+              for i, neighbours in enumerate( adjacency ) ]
+    return names, adjacency, higher
+
+def get_first_computers( names: list[str], adjacency: list[ set[int] ], higher: list[ set[int] ],
+                        filter: str = None ) :
+    # each set of 3 is found only once, from its first computer:
+    # without filter, its lowest ranked computer, with the 2 others taken in higher
+    # with filter, its lowest ranked computer starting with filter,
+    # with the 2 others either ranked after it or not starting with filter
+    for comp1, name in enumerate( names ) :
+        if filter is None :
+            yield comp1, higher[ comp1 ]
+        elif name.startswith( filter ) :
+            yield comp1, { comp for comp in adjacency[ comp1 ]
+                          if comp > comp1 or not names[ comp ].startswith( filter ) }
+
+def iter_sets( network: dict[ str, set[str] ], filter: str = None ) :
+    names, adjacency, higher = get_ranked_network( network )
+    for comp1, candidates in get_first_computers( names, adjacency, higher, filter ) :
+        for comp2 in candidates :
+            for comp3 in candidates & higher[ comp2 ] :
+                yield names[ comp1 ], names[ comp2 ], names[ comp3 ]
+
+def count_sets( network: dict[ str, set[str] ], filter: str = None ) -> int :
+    # same as iter_sets, without building the sets of 3
+    names, adjacency, higher = get_ranked_network( network )
+    count = 0
+    for comp1, candidates in get_first_computers( names, adjacency, higher, filter ) :
+        for comp2 in candidates :
+            count += len( candidates & higher[ comp2 ] )
+    return count
 
 def do_problem( str_data: str, verbose: bool = False ) :
     network = parse_data( str_data, verbose )
     #print()
-    #print( "All sets of 3" )
-    #comp_sets = find_sets( network, None, verbose )
-    print()
-    print( "All sets of 3 starting wth 't'" )
-    t_comp_sets = find_sets( network, "t", verbose )
+    #print( f"Nb of sets of 3: {count_sets( network )}" )
+    if verbose :
+        print()
+        print( "All sets of 3 starting wth 't'" )
+        for comp_set in iter_sets( network, "t" ) :
+            print( f"Computer set: {comp_set}" )
     print()
-    print( f"Nb of sets of 3 starting wth 't': {len(t_comp_sets)}" )
+    print( f"Nb of sets of 3 starting wth 't': {count_sets( network, 't' )}" )
     print( f"END" )
 
 def do_tests( i: int = None ) :
@@ -3,6 +3,7 @@
 import time
 from collections import namedtuple
 import re
+import heapq
 
 def get_test_file_path( i: int = None ) -> str :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -30,38 +31,78 @@ def parse_data( str_data: str, verbose: bool = False ) :
             print( f"Connected to {comp}: {network[ comp ]}" )
     return network
 
-def find_cliques( network: dict[ str, set[str] ], verbose: bool = False ) :
-    cliques = set()
-    
-    # BRON-KERBOSCH ALGORITHM
-    # https://en.wikipedia.org/wiki/Bron–Kerbosch_algorithm
-    # https://fr.wikipedia.org/wiki/Algorithme_de_Bron-Kerbosch
-    def bron_kerbosch( r: set[str], p: set[str], x: set[str] ) :
-        if len(p) == 0 and len(x) == 0 :
-            new_clique = tuple( sorted( r ) )
-            if verbose :
-                print( f"Adding {len(new_clique)}-computers clique; {new_clique}" )
-            cliques.add( new_clique )
-        else :
-            p_tuple = tuple( sorted( p ) )
-            for node in p_tuple :
-                new_r = r.union( { node } )
-                new_p = p.intersection( network[ node ] )
-                new_x = x.intersection( network[ node ] )
-                bron_kerbosch( new_r, new_p, new_x )
-                p.remove( node )
-                x.add( node )
-
-    # initial call
-    print( f"Searching for cliques..." )
-    bron_kerbosch( set(), set( network.keys() ), set() )
-    print( f"{len(cliques)} cliques found" )
-    return cliques
+def get_bitset_network( network: dict[ str, set[str] ] ) -> tuple[ list[str], list[int] ] :
+    # computers are given integer ids (in alphabetical order)
+    # and the neighbours of computer #i are the bits set in adjacency[i]
+    names = sorted( network.keys() )
+    ids = { name: i for i, name in enumerate( names ) }
+    adjacency = [ sum( 1 << ids[ neighbour ] for neighbour in network[ name ] ) for name in names ]
+    return names, adjacency
+
+def iter_bits( bitset: int ) :
+    # ids of the bits set in bitset, lowest first
+    while bitset :
+        lowest = bitset & -bitset
+        yield lowest.bit_length() - 1
+        bitset ^= lowest
+
+def get_degeneracy_order( adjacency: list[int] ) -> list[int] :
+    # repeatedly remove the computer with the fewest remaining neighbours
+    degrees = [ neighbours.bit_count() for neighbours in adjacency ]
+    heap = [ ( degree, node ) for node, degree in enumerate( degrees ) ]
+    heapq.heapify( heap )
+    removed = 0
+    order = []
+    while len( heap ) > 0 :
+        degree, node = heapq.heappop( heap )
+        if removed >> node & 1 or degree != degrees[ node ] :
+            # outdated entry
+            continue
+        order.append( node )
+        removed |= 1 << node
+        for neighbour in iter_bits( adjacency[ node ] & ~removed ) :
+            degrees[ neighbour ] -= 1
+            heapq.heappush( heap, ( degrees[ neighbour ], neighbour ) )
+    return order
+
+def find_max_clique( network: dict[ str, set[str] ], bound: bool = True,
+                    verbose: bool = False ) -> tuple[str] :
+    names, adjacency = get_bitset_network( network )
+    best_clique, best_size = 0, 0
+
+    # BRON-KERBOSCH ALGORITHM, with Tomita pivoting, on bitsets
+    # only the largest clique found so far is kept
+    # with bound set, branches that cannot beat it are cut
+    def bron_kerbosch( r: int, r_size: int, p: int, x: int ) :
+        nonlocal best_clique, best_size
+        if p == 0 :
+            if x == 0 and r_size > best_size :
+                best_clique, best_size = r, r_size
+                if verbose :
+                    print( f"New largest clique: {r_size} computers" )
+            return
+        if bound and r_size + p.bit_count() <= best_size :
+            return
+        # the pivot is the node with the most neighbours in p:
+        # its neighbours are in the cliques found from the pivot (or from a non-neighbour)
+        pivot = max( iter_bits( p | x ), key = lambda node: ( p & adjacency[ node ] ).bit_count() )
+        for node in iter_bits( p & ~adjacency[ pivot ] ) :
+            bron_kerbosch( r | 1 << node, r_size + 1, p & adjacency[ node ], x & adjacency[ node ] )
+            p &= ~( 1 << node )
+            x |= 1 << node
+
+    # initial calls, in degeneracy order: each node only sees its later neighbours in p
+    print( f"Searching for the largest clique..." )
+    p, x = ( 1 << len( names ) ) - 1, 0
+    for node in get_degeneracy_order( adjacency ) :
+        bron_kerbosch( 1 << node, 1, p & adjacency[ node ], x & adjacency[ node ] )
+        p &= ~( 1 << node )
+        x |= 1 << node
+    return tuple( names[ node ] for node in iter_bits( best_clique ) )
 
 def do_problem( str_data: str, verbose: bool = False ) :
     network = parse_data( str_data, verbose )
-    cliques = find_cliques( network, verbose )
-    max_clique = max( cliques, key = len )
+    max_clique = find_max_clique( network, verbose = verbose )
     print( f"Maximum sized clique contains {len(max_clique)} computers:" )
     clique_signature = ",".join( max_clique )
     print( f"\n{clique_signature}\n" )
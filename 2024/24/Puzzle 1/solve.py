@@ -3,6 +3,8 @@
 import time
 from collections import namedtuple
 import re
+import operator
+from collections import defaultdict
 
 def get_test_file_path( i: int = None ) -> str :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -21,6 +23,12 @@ INPUT_RE = re.compile( r"^(?P<name>[\w\d]{3}): (?P<value>[01])$" )
 # x00 AND y00 -> z00
 GATE_RE = re.compile( r"^(?P<a>[\w\d]{3}) (?P<op>AND|OR|XOR) (?P<b>[\w\d]{3}) -> (?P<name>[\w\d]{3})$" )
 
+# one step of a compiled netlist: out = op( in_1, in_2 )
+Instruction = namedtuple( "Instruction", [ "out", "op", "in_1", "in_2" ] )
+
+# the operators work on ints (each bit of an int is one input vector) as well as on numpy arrays
+OPERATORS = { "AND": operator.and_, "OR": operator.or_, "XOR": operator.xor }
+
 Input = namedtuple( "Input", [ "name", "value" ] )
 Gate = namedtuple( "Gate", [ "a", "op", "b" ] )
 
@@ -65,26 +73,44 @@ def parse_data( str_data: str, verbose: bool = False ) :
         print( f"z output gates: {z}" )
     return x, y, z, gates, solved
 
-def solve( name: str, gates: dict[ str, Gate ], solved: dict[ str, int ], verbose: bool ) -> int :
-    if solved[ name ] is None :
-        gate = gates[ name ]
-        a_value = solve( gate.a, gates, solved, verbose )
-        b_value = solve( gate.b, gates, solved, verbose )
-        if gate.op == "AND" :
-            solved[ name ] = a_value & b_value
-        elif gate.op == "OR" :
-            solved[ name ] = a_value | b_value
-        elif gate.op == "XOR" :
-            solved[ name ] = a_value ^ b_value
-        if verbose:
-            print( f"Computed value for gate {name}: {gate.a} {gate.op} {gate.b} = {solved[ name ]}" )
-    return solved[ name ]
+def compile_netlist( gates: dict[ str, Gate ], verbose: bool = False ) -> list[ Instruction ] :
+    # the gates are sorted once in topological order (Kahn's algorithm)
+    # so that the whole circuit can be evaluated in a single sweep
+    consumers: dict[ str, list[str] ] = defaultdict( list )
+    nb_pending: dict[ str, int ] = dict()
+    for out, gate in gates.items() :
+        nb_pending[ out ] = 0
+        for wire in ( gate.a, gate.b ) :
+            if wire in gates :
+                nb_pending[ out ] += 1
+                consumers[ wire ].append( out )
+    ready = [ out for out, nb in nb_pending.items() if nb == 0 ]
+    program: list[ Instruction ] = []
+    while len( ready ) > 0 :
+        out = ready.pop()
+        gate = gates[ out ]
+        program.append( Instruction( out, OPERATORS[ gate.op ], gate.a, gate.b ) )
+        for consumer in consumers[ out ] :
+            nb_pending[ consumer ] -= 1
+            if nb_pending[ consumer ] == 0 :
+                ready.append( consumer )
+    if len( program ) != len( gates ) :
+        raise RuntimeError( f"The netlist contains a loop: only {len(program)}/{len(gates)} gates can be sorted" )
+    if verbose :
+        print( f"Netlist compiled: {len(program)} instructions" )
+    return program
+
+def run_netlist( program: list[ Instruction ], values: dict[ str, int ] ) -> dict[ str, int ] :
+    # values holds the input wires, the output wires are added to it
+    # each value may hold many input vectors, one per bit (bit-sliced evaluation)
+    for out, op, in_1, in_2 in program :
+        values[ out ] = op( values[ in_1 ], values[ in_2 ] )
+    return values
 
 def do_problem( str_data: str, verbose: bool = False ) :
     x, y, z, gates, solved = parse_data( str_data, verbose )
-    output = ""
-    for name in z :
-        output += str( solve( name, gates, solved, verbose ) )
+    values = run_netlist( compile_netlist( gates, verbose ), solved )
+    output = "".join( str( values[ name ] ) for name in z )
     print( f"z output: 0b{output} = {int( output, base=2 )}" )
     print( f"END" )
 
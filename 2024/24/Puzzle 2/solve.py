@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 
 import time
+import random
 from typing import Union, Optional
 from collections import namedtuple
 from dataclasses import dataclass
 import re
+import operator
+from collections import defaultdict
 
 def get_test_file_path( i: int = None ) -> str :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -23,6 +26,12 @@ INPUT_RE = re.compile( r"^(?P<name>[\w\d]{3}): (?P<value>[01])$" )
 # x00 AND y00 -> z00
 GATE_RE = re.compile( r"^(?P<a>[\w\d]{3}) (?P<op>AND|OR|XOR) (?P<b>[\w\d]{3}) -> (?P<name>[\w\d]{3})$" )
 
+# one step of a compiled netlist: out = op( in_1, in_2 )
+Instruction = namedtuple( "Instruction", [ "out", "op", "in_1", "in_2" ] )
+
+# the operators work on ints (each bit of an int is one input vector) as well as on numpy arrays
+OPERATORS = { "AND": operator.and_, "OR": operator.or_, "XOR": operator.xor }
+
 @dataclass( frozen = True )
 class Gate :
     op: str
@@ -33,18 +42,15 @@ class Gate :
         repr = f"< {self.in_1} {self.op} {self.in_2} >"
         return repr
     
-    def __eq__( self, comp: 'Gate' ) :
+    def __post_init__( self ) :
         # Gates are symetrical (input wise)
         # we want Gate( "XOR", "abc", "def" ) == Gate( "XOR", "def", "abc" )
-        return self.op == comp.op and \
-                sorted( ( self.in_1, self.in_2 ) ) == \
-                    sorted( ( comp.in_1, comp.in_2 ) )
-
-    def __hash__( self ) :
-        # Gates are symetrical (input wise)
-        # we want dict[ Gate( "XOR", "abc", "def" ) ] <=> dict[ Gate( "XOR", "def", "abc" ) ]
-        #print( f"__hash__ for gate {self}" )
-        return hash( tuple( [ self.op, ] + sorted( ( self.in_1, self.in_2 ) ) ) )
+        # so the inputs are sorted once, when the gate is created
+        # and the default __eq__ and __hash__ of the dataclass compare the fields as they are
+        if self.in_2 < self.in_1 :
+            in_1, in_2 = self.in_2, self.in_1
+            object.__setattr__( self, "in_1", in_1 )
+            object.__setattr__( self, "in_2", in_2 )
 
     def eval( self, in_1_value: int, in_2_value: int ) -> int :
         if self.op == "AND" :
@@ -54,6 +60,9 @@ class Gate :
         elif self.op == "XOR" :
             return in_1_value ^ in_2_value
 
+# lookups of the gates by (op, input wire), and of the gates consuming a wire
+NetlistIndex = namedtuple( "NetlistIndex", [ "by_input", "consumers" ] )
+
 @dataclass
 class WiredGate :
     gate: Gate
@@ -101,16 +110,6 @@ def parse_data( str_data: str, verbose: bool = False ) :
         print( f"z output wires: {z}" )
     return x_decimal, y_decimal, z, gates, inputs
 
-def solve( name: str, gates: dict[ str, Gate ], solved: dict[ str, int ], verbose: bool ) -> int :
-    if solved.get( name, None ) is None :
-        gate = gates[ name ]
-        in_1_value = solve( gate.in_1, gates, solved, verbose )
-        in_2_value = solve( gate.in_2, gates, solved, verbose )
-        solved[ name ] = gate.eval( in_1_value, in_2_value )
-        if verbose:
-            print( f"Solved {name}: {gate} = {solved[ name ]}" )
-    return solved[ name ]
-
 def get_input_names( index ) :
     return f"x{index:02}", f"y{index:02}"
 
@@ -152,12 +151,22 @@ def check_expected_wire( actual_wire, expected_wire, gates, wires, swaps: list[s
         gates, wires = swap_wires( gates, wires, actual_wire, expected_wire )
     return gates, wires, swaps, swapped
 
-def find_gates( op: str, input: str, wires: dict[ Gate, str ] ) -> list[Gate] :
-    gates = []
-    for gate in wires :
-        if gate.op == op and input in ( gate.in_1, gate.in_2 ) :
-            gates.append( gate )
-    return gates
+def make_netlist_index( gates: dict[ str, Gate ] ) -> NetlistIndex :
+    # swapping wires only changes which gate drives a wire, never the inputs of a gate
+    # so the index stays valid after swap_wires
+    by_input: dict[ tuple[ str, str ], list[Gate] ] = defaultdict( list )
+    consumers: dict[ str, list[Gate] ] = defaultdict( list )
+    for gate in gates.values() :
+        for input in dict.fromkeys( ( gate.in_1, gate.in_2 ) ) :
+            by_input[ ( gate.op, input ) ].append( gate )
+            consumers[ input ].append( gate )
+    return NetlistIndex( by_input, consumers )
+
+def find_gates( op: str, input: str, netlist: NetlistIndex ) -> list[Gate] :
+    return netlist.by_input.get( ( op, input ), [] )
+
+def get_consumers( wire: str, netlist: NetlistIndex ) -> list[Gate] :
+    return netlist.consumers.get( wire, [] )
 
 def get_other_input( gate: Gate, input: str ) -> str :
     if gate.in_1 == input :
@@ -234,7 +243,8 @@ class FullAdder :
         ]
         return "\n".join( repr )
 
-def get_full_adder( index: int, c_in: str, gates: dict[ str, Gate ], wires: dict[ Gate, str ] ) :
+def get_full_adder( index: int, c_in: str, gates: dict[ str, Gate ], wires: dict[ Gate, str ],
+                   netlist: NetlistIndex ) :
     print()
     print( f"Contructing Full Adder #{index}..." )
     swaps = []
@@ -254,8 +264,8 @@ def get_full_adder( index: int, c_in: str, gates: dict[ str, Gate ], wires: dict
         # z_gate & and/or_2_gate do not exists
         # means thet either xor_1_wire or c_in is swapped ...
         print( f"Either {xor_1_wire} (xor 1) or {c_in} (carry in) is swapped with another wire..." )
-        xor_1_gates = find_gates( "XOR", xor_1_wire, wires ) + find_gates( "AND", xor_1_wire, wires )
-        c_in_gates = find_gates( "XOR", c_in, wires ) + find_gates( "AND", c_in, wires )
+        xor_1_gates = find_gates( "XOR", xor_1_wire, netlist ) + find_gates( "AND", xor_1_wire, netlist )
+        c_in_gates = find_gates( "XOR", c_in, netlist ) + find_gates( "AND", c_in, netlist )
         if len(xor_1_gates) == 2 and len(c_in_gates) == 2 :
             raise RuntimeError( f"Full Adder: Cannot decide which wire is swapped between {xor_1_wire} and {c_in}" )
         elif len(xor_1_gates) == 2 :
@@ -301,6 +311,25 @@ def get_full_adder( index: int, c_in: str, gates: dict[ str, Gate ], wires: dict
         # c_gate & does not exists
         # either and_1_wire or and_2_wore is false
         print( f"Either {and_1_wire} (and 1) or {and_2_wire} (and 2) is swapped with another wire..." )
+        and_1_gates = [ gate for gate in get_consumers( and_1_wire, netlist ) if gate.op == "OR" ]
+        and_2_gates = [ gate for gate in get_consumers( and_2_wire, netlist ) if gate.op == "OR" ]
+        if len(and_1_gates) == 1 and len(and_2_gates) == 0 :
+            # and_1_wire is correct, and_2_wire is swapped
+            correct_and_2_wire = get_other_input( and_1_gates[0], and_1_wire )
+            gates, wires = swap_wires( gates, wires, and_2_wire, correct_and_2_wire )
+            swaps.append( ( and_2_wire, correct_and_2_wire ) )
+            and_2_wire = correct_and_2_wire
+        elif len(and_2_gates) == 1 and len(and_1_gates) == 0 :
+            # and_2_wire is correct, and_1_wire is swapped
+            correct_and_1_wire = get_other_input( and_2_gates[0], and_2_wire )
+            gates, wires = swap_wires( gates, wires, and_1_wire, correct_and_1_wire )
+            swaps.append( ( and_1_wire, correct_and_1_wire ) )
+            and_1_wire = correct_and_1_wire
+        else :
+            raise RuntimeError( f"Full Adder: Cannot find swapped wire between {and_1_wire} and {and_2_wire}" )
+        print( f"Remaking C out gate" )
+        c_gate = Gate( "OR", and_1_wire, and_2_wire )
+        c_wire = get_wire( c_gate, wires )
     full_adder = FullAdder( index, x_in, y_in, c_in, WiredGate( xor_1_gate, xor_1_wire )
                            , WiredGate( z_gate, z_expected_wire ), WiredGate( and_1_gate, and_1_wire )
                            , WiredGate( and_2_gate, and_2_wire ), WiredGate( c_gate, c_wire ) )
@@ -313,12 +342,13 @@ def fix_gates( original_gates: dict[ str, Gate ], inputs: dict[ str, int ], bits
     for out, gate in original_gates.items() :
         wires[ gate ] = out
     new_gates = original_gates.copy()
+    netlist = make_netlist_index( original_gates )
 
     swaps, last_adder = get_half_adder( 0, new_gates, wires )
     valid_adders = []
 
     for index in range( 1, bits ) :
-        new_swaps, next_adder = get_full_adder( index, last_adder.c_out.wire, new_gates, wires )
+        new_swaps, next_adder = get_full_adder( index, last_adder.c_out.wire, new_gates, wires, netlist )
         last_adder.c_out.wire = next_adder.c_in
         swaps = swaps + new_swaps
         valid_adders.append( last_adder )
@@ -333,13 +363,72 @@ def fix_gates( original_gates: dict[ str, Gate ], inputs: dict[ str, int ], bits
     print( f"Swaps found: {swaps}" )
     return swaps, new_gates
 
+def compile_netlist( gates: dict[ str, Gate ], verbose: bool = False ) -> list[ Instruction ] :
+    # the gates are sorted once in topological order (Kahn's algorithm)
+    # so that the whole circuit can be evaluated in a single sweep
+    consumers: dict[ str, list[str] ] = defaultdict( list )
+    nb_pending: dict[ str, int ] = dict()
+    for out, gate in gates.items() :
+        nb_pending[ out ] = 0
+        for wire in ( gate.in_1, gate.in_2 ) :
+            if wire in gates :
+                nb_pending[ out ] += 1
+                consumers[ wire ].append( out )
+    ready = [ out for out, nb in nb_pending.items() if nb == 0 ]
+    program: list[ Instruction ] = []
+    while len( ready ) > 0 :
+        out = ready.pop()
+        gate = gates[ out ]
+        program.append( Instruction( out, OPERATORS[ gate.op ], gate.in_1, gate.in_2 ) )
+        for consumer in consumers[ out ] :
+            nb_pending[ consumer ] -= 1
+            if nb_pending[ consumer ] == 0 :
+                ready.append( consumer )
+    if len( program ) != len( gates ) :
+        raise RuntimeError( f"The netlist contains a loop: only {len(program)}/{len(gates)} gates can be sorted" )
+    if verbose :
+        print( f"Netlist compiled: {len(program)} instructions" )
+    return program
+
+def run_netlist( program: list[ Instruction ], values: dict[ str, int ] ) -> dict[ str, int ] :
+    # values holds the input wires, the output wires are added to it
+    # each value may hold many input vectors, one per bit (bit-sliced evaluation)
+    for out, op, in_1, in_2 in program :
+        values[ out ] = op( values[ in_1 ], values[ in_2 ] )
+    return values
+
 def solve_gates( z: list[str], gates: dict[ str, Gate], inputs: dict[ str, int] , verbose: bool ) :
-    z_output = ""
-    solved = inputs.copy()
-    for name in z :
-        z_output += str( solve( name, gates, solved, verbose ) )
+    values = run_netlist( compile_netlist( gates, verbose ), inputs.copy() )
+    z_output = "".join( str( values[ name ] ) for name in z )
     return int( z_output, base=2 )
 
+def get_bitsliced_inputs( x_values: list[int], y_values: list[int], bits: int ) -> dict[ str, int ] :
+    # the input wire xNN holds bit NN of every x value: bit j of the wire is for x_values[j]
+    inputs = dict()
+    for index in range( bits ) :
+        x_in, y_in = get_input_names( index )
+        inputs[ x_in ] = sum( ( x >> index & 1 ) << j for j, x in enumerate( x_values ) )
+        inputs[ y_in ] = sum( ( y >> index & 1 ) << j for j, y in enumerate( y_values ) )
+    return inputs
+
+def get_bitsliced_outputs( z: list[str], values: dict[ str, int ], nb_vectors: int ) -> list[int] :
+    # back from the z wires (most significant first) to one z value per input vector
+    return [ sum( ( values[ name ] >> j & 1 ) << ( len( z ) - 1 - i ) for i, name in enumerate( z ) )
+            for j in range( nb_vectors ) ]
+
+def check_adder( z: list[str], gates: dict[ str, Gate ], bits: int, nb_vectors: int = 64,
+                seed: int = 0, verbose: bool = False ) -> list[ tuple[ int, int ] ] :
+    # evaluates nb_vectors random additions in a single sweep of the compiled netlist
+    # (drawn from a fixed seed by default, so that runs are reproducible)
+    # returns the (x, y) vectors for which the circuit is not a valid adder
+    rng = random.Random( seed )
+    x_values = [ rng.getrandbits( bits ) for _ in range( nb_vectors ) ]
+    y_values = [ rng.getrandbits( bits ) for _ in range( nb_vectors ) ]
+    values = run_netlist( compile_netlist( gates, verbose ),
+                         get_bitsliced_inputs( x_values, y_values, bits ) )
+    z_values = get_bitsliced_outputs( z, values, nb_vectors )
+    return [ ( x, y ) for x, y, z_value in zip( x_values, y_values, z_values ) if x + y != z_value ]
+
 def do_problem( str_data: str, bits: int, verbose: bool = False ) :
     x_decimal, y_decimal, z, gates, inputs = parse_data( str_data, verbose )
     z_expected = x_decimal + y_decimal
@@ -359,6 +448,9 @@ def do_problem( str_data: str, bits: int, verbose: bool = False ) :
     print( f"z output: {bin(z_decimal)} = {z_decimal}" )
     print( f"expected: {bin(z_expected)} = {z_expected}" )
 
+    errors = check_adder( z, new_gates, bits, 1024, verbose = verbose )
+    print( f"Random additions check: {1024 - len(errors)}/1024 valid" )
+
     print()
     result = sorted( wire for swap in swaps for wire in swap )
     str_result = ",".join( result )
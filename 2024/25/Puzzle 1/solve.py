@@ -3,6 +3,8 @@
 import time
 from dataclasses import dataclass
 import re
+from collections import Counter
+import numpy as np
 
 def get_test_file_path( i = None ) :
     return "tests.txt" if i is None else f"tests_{i}.txt"
@@ -19,6 +21,7 @@ def get_file_content( file_path ) :
 class Lock :
     height: int
     pins: tuple[int]
+    mask: int = 0 # one bit per "#" cell of the schematic
     
     def __repr__(self):
         repr = [ f"Lock: {self.height} x {self.pins}" ]
@@ -33,6 +36,7 @@ class Lock :
 @dataclass
 class Key :
     heights: tuple[int]
+    mask: int = 0 # one bit per "#" cell of the schematic
     
     def __repr__(self):
         repr = [ f"Key: {self.heights}" ]
@@ -45,6 +49,11 @@ class Key :
         repr.append( "" )
         return "\n".join( repr )
 
+def get_mask( part: str ) -> int :
+    # the "#" cells of the schematic, read row by row, as the bits of an int
+    cells = part.replace( "\n", "" )
+    return int( cells.replace( "#", "1" ).replace( ".", "0" )[::-1], base=2 )
+
 def parse_data( str_data: str, verbose: bool = False ) :
     locks = []
     keys = []
@@ -58,21 +67,42 @@ def parse_data( str_data: str, verbose: bool = False ) :
             for i, char in enumerate( line ) :
                 pins[i] += 1 if char == "#" else 0
         if part[0] == "#" :
-            locks.append( Lock( height, tuple( pins ) ) )
+            locks.append( Lock( height, tuple( pins ), get_mask( part ) ) )
         else :
-            keys.append( Key( tuple( pins ) ) )
+            keys.append( Key( tuple( pins ), get_mask( part ) ) )
     return locks, keys
 
-def fit( lock: Lock, key: Key, lock_id: int, key_id: int, verbose: bool ) :
-    print( f"Testing lock #{lock_id} with key #{key_id}..." )
-    for i, pin_height in enumerate( lock.pins, start=0 ) :
-        if pin_height + key.heights[ i ] > lock.height :
-            print( f"Lock & key overlap in pin #{i+1}" )
-            return False
-    print( f"Lock & key fit" )
-    return True
+def count_fits( locks: list[Lock], keys: list[Key], verbose: bool = False ) -> int :
+    # a lock and a key fit if no cell is "#" in both: lock.mask & key.mask == 0
+    # locks and keys with the same pin profile have the same mask: only profiles are tested
+    lock_profiles = Counter( lock.mask for lock in locks )
+    key_profiles = Counter( key.mask for key in keys )
+    if verbose :
+        print( f"{len(lock_profiles)} lock profiles & {len(key_profiles)} key profiles" )
+    return sum( lock_count * key_count
+               for lock_mask, lock_count in lock_profiles.items()
+               for key_mask, key_count in key_profiles.items()
+               if lock_mask & key_mask == 0 )
+
+def count_fits_numpy( locks: list[Lock], keys: list[Key], chunk_size: int = 1000,
+                     verbose: bool = False ) -> int :
+    # same as count_fits, with the masks of the profiles in uint64 arrays
+    # (schematics must have at most 64 cells, 5x7 = 35 for the puzzle)
+    # every lock profile of a chunk is tested against every key profile at once
+    lock_masks, lock_counts = np.unique( np.array( [ lock.mask for lock in locks ], dtype = np.uint64 ),
+                                        return_counts = True )
+    key_masks, key_counts = np.unique( np.array( [ key.mask for key in keys ], dtype = np.uint64 ),
+                                      return_counts = True )
+    if verbose :
+        print( f"{len(lock_masks)} lock profiles & {len(key_masks)} key profiles" )
+    nb_fits = 0
+    for start in range( 0, len( lock_masks ), chunk_size ) :
+        chunk = slice( start, start + chunk_size )
+        fits = ( lock_masks[ chunk, None ] & key_masks[ None, : ] ) == 0
+        nb_fits += int( lock_counts[ chunk ] @ ( fits @ key_counts ) )
+    return nb_fits
 
-def do_problem( str_data: str, verbose = False ) :
+def do_problem( str_data: str, verbose = False, use_numpy: bool = False ) :
     locks, keys = parse_data( str_data, verbose )
     print( f"{len(locks)} locks & {len(keys)} keys" )
     if verbose :
@@ -80,11 +110,10 @@ def do_problem( str_data: str, verbose = False ) :
             print( lock )
         for key in keys :
             print( key )
-    nb_fits = 0
-    for i, lock in enumerate( locks, start=1 ) :
-        for j, key in enumerate( keys, start=1 ) :
-            if fit( lock, key, i, j, verbose ) :
-                nb_fits += 1
+    if use_numpy :
+        nb_fits = count_fits_numpy( locks, keys, verbose = verbose )
+    else :
+        nb_fits = count_fits( locks, keys, verbose )
     print( f"\nNb lock/key pair fits: {nb_fits}" )
     print( f"END" )
 